@@ -1,3 +1,4 @@
+from pydantic import Field
 from pydantic_settings import BaseSettings
 from pathlib import Path
 import sys
@@ -9,17 +10,66 @@ class Settings(BaseSettings):
     HOST: str = "0.0.0.0"
     PORT: int = 8000
     DEBUG: bool = False
+    WORKERS: int = 1  # uvicorn worker processes, more than one requires BUS_ENABLED
 
     # logging
     LOG_LEVEL: str = "INFO"
     LOG_FILE: str = "logs/gt7_telemetry.log"
+    LOG_ENQUEUE: bool = True  # write logs from a background thread instead of the event loop
+    LOG_DIAGNOSE: bool = False  # variable values in tracebacks, slow and may leak data
+    LOG_RATE_LIMIT_INTERVAL: float = 5.0  # seconds, repeated hot path errors are aggregated per interval
+    LOG_RATE_LIMIT_BURST: int = 3  # messages per interval before aggregating
 
     # gt7 settings
-    GT7_HEARTBEAT_INTERVAL: int = 100  # packets
-    GT7_SOCKET_TIMEOUT: int = 10  # seconds
+    # seconds, GT7 needs one roughly every 100 packets. Renamed from GT7_HEARTBEAT_INTERVAL, which
+    # counted packets, so an old value of 100 can't silently become 100 seconds
+    GT7_HEARTBEAT_INTERVAL_S: float = Field(1.6, gt=0, le=5)
+    GT7_SOCKET_TIMEOUT: float = 10  # seconds without packets before the socket is rebound
+    GT7_IDLE_OUTPUT_INTERVAL: float = 1.0  # seconds between packets while paused/loading, 0 = suppress
+
+    # derived channels (g-forces, wheel slip, shift points)
+    DERIVED_CHANNELS_ENABLED: bool = True
+
+    # tire thermal analytics (/ws/tires), temperatures in degrees C
+    TIRE_OPTIMAL_MIN: float = 70.0
+    TIRE_OPTIMAL_MAX: float = 95.0
+    TIRE_TREND_TIME_CONSTANT: float = 5.0  # seconds, EWMA time constant
+    TIRE_SUMMARY_INTERVAL: float = 1.0  # seconds between summaries
+
+    # session recording
+    RECORDING_ENABLED: bool = False
+    RECORDINGS_DIR: str = "recordings"
+
+    # lap database, sessions and per-lap aggregates for history queries
+    LAP_DB_ENABLED: bool = True
+    LAP_DB_PATH: str = "laps.db"
+
+    # profiling, fraction of packets to time per stage (0 = disabled)
+    PROFILE_SAMPLE_RATE: float = 0.0
+    ADMIN_TOKEN: str = ""  # required as X-Admin-Token on /admin endpoints, which are disabled while empty
+
+    # telemetry bus, one ingest process owns the UDP sockets and fans packets out to workers
+    BUS_ENABLED: bool = False
+    BUS_SOCKET_PATH: str = "/tmp/gt7_telemetry.sock"
+    BUS_START_INGEST: bool = True  # start the ingest process from main.py
+    BUS_QUEUE_SIZE: int = 256  # packets buffered per subscriber before the oldest are dropped
 
     # WebSocket
     WS_HEARTBEAT_INTERVAL: int = 30
+    WS_HANDSHAKE_TIMEOUT: float = 10  # seconds to send the PlayStation IP after connecting
+    WS_IDLE_TIMEOUT: float = 300  # seconds without telemetry before a connection is evicted, 0 = never
+    WS_MAX_MESSAGE_SIZE: int = 4096  # bytes, clients only ever send the PlayStation IP
+
+    # connection admission, 0 = unlimited. Limits apply per worker, except the bus also
+    # enforces MAX_VIEWERS_PER_CONSOLE across all workers
+    MAX_CONNECTIONS: int = 64
+    MAX_CONNECTIONS_PER_IP: int = 8
+    MAX_VIEWERS_PER_CONSOLE: int = 8
+
+    # jitter buffer
+    JITTER_BUFFER_ENABLED: bool = False
+    JITTER_LATENCY_MS: int = 50  # max time a packet is held for reordering
+    JITTER_OUTPUT_RATE: int = 0  # Hz, 0 = reorder only, >0 = paced output with interpolation
 
     class Config:
         env_file = ".env"
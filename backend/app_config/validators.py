@@ -28,3 +28,15 @@ def validate_ps_ip(ip: str) -> Optional[str]:
         raise ValueError("Invalid IP Address")
 
     return ip
+
+
+
+def validate_session_name(name: str) -> str:
+    """Validate a recorded session file name, rejecting anything that could escape the recordings directory"""
+    if not name or not isinstance(name, str):
+        raise ValueError("Session name is required")
+
+    if not re.match(r'^[\w\-]+\.gt7$', name):
+        raise ValueError("Invalid session name")
+
+    return name
@@ -0,0 +1,129 @@
+# Synthetic GT7 Datagrams
+import math
+import socket
+import struct
+import threading
+import time
+from typing import Dict, List, Optional
+
+from Crypto.Cipher import Salsa20
+
+from telemetry.reader import TelemetryReader
+from telemetry.models import SimulatorFlags
+
+KEY = b'Simulator Interface Packet GT7 ver 0.0'
+MAGIC = 0x47375330
+PACKET_SIZE = 0x128
+GEAR_RATIOS = (3.2, 2.1, 1.5, 1.2, 1.0, 0.85, 0.0, 0.0)
+
+
+def build_packet(packet_id: int, car_id: int = 24, laps: int = 5, packets_per_lap: int = 3600) -> bytes:
+    """Build a plausible decrypted packet: a car lapping a 1 km circle at varying speed."""
+    data = bytearray(PACKET_SIZE)
+    t = packet_id / 60.0
+    angle = 2 * math.pi * (packet_id % packets_per_lap) / packets_per_lap
+    speed = 40.0 + 15.0 * math.sin(t / 3)
+    radius = 1000 / (2 * math.pi)
+    gear = min(1 + int(speed // 12), 6)
+    rpm = 3000.0 + (speed % 12) * 400
+
+    struct.pack_into('i', data, 0x00, MAGIC)
+    struct.pack_into('fff', data, 0x04, radius * math.cos(angle), 0.0, radius * math.sin(angle))
+    struct.pack_into('fff', data, 0x10, -speed * math.sin(angle), 0.0, speed * math.cos(angle))
+    struct.pack_into('f', data, 0x3C, rpm)
+    struct.pack_into('ff', data, 0x44, 80.0 - packet_id / 10_000, 100.0)
+    struct.pack_into('f', data, 0x4C, speed)
+    struct.pack_into('ffff', data, 0x60, 80.0, 81.0, 78.0, 79.0)
+    struct.pack_into('i', data, 0x70, packet_id)
+    struct.pack_into('hh', data, 0x74, 1 + packet_id // packets_per_lap % laps, laps)
+    struct.pack_into('ii', data, 0x78, 90_000, 91_000)
+    struct.pack_into('hh', data, 0x84, 1, 16)
+    struct.pack_into('hh', data, 0x88, 7000, 8000)
+    struct.pack_into('H', data, 0x8E, SimulatorFlags.CAR_ON_TRACK | SimulatorFlags.IN_GEAR)
+    struct.pack_into('BBB', data, 0x90, gear | (min(gear + 1, 6) << 4), 230, 0)
+    struct.pack_into('8f', data, 0x104, *GEAR_RATIOS)
+    struct.pack_into('i', data, 0x124, car_id)
+    return bytes(data)
+
+
+def encrypt_packet(plaintext: bytes, iv1: int) -> bytes:
+    """Encrypt a packet the way GT7 does, the inverse of TelemetryReader._decrypt_packet."""
+    iv2 = iv1 ^ 0xDEADBEAF
+    nonce = iv2.to_bytes(4, 'little') + iv1.to_bytes(4, 'little')
+    encrypted = bytearray(Salsa20.new(key=KEY[:32], nonce=nonce).encrypt(plaintext))
+    # the IV travels in clear text inside the datagram
+    encrypted[0x40:0x44] = iv1.to_bytes(4, 'little')
+    return bytes(encrypted)
+
+
+def generate_datagrams(count: int, start_id: int = 1, car_id: int = 24) -> List[bytes]:
+    """Generate `count` encrypted datagrams with consecutive packet ids."""
+    return [
+        encrypt_packet(build_packet(packet_id, car_id=car_id), iv1=packet_id * 7919 & 0xFFFFFFFF)
+        for packet_id in range(start_id, start_id + count)
+    ]
+
+
+class FakeConsole:
+    """
+        UDP stand-in for a PlayStation: waits for the first heartbeat, then sends datagrams to
+        the reader port at a fixed rate and records when each packet_id was sent.
+    """
+
+    def __init__(self, datagrams: List[bytes], rate: float = 1000.0, start_id: int = 1,
+                 host: str = '127.0.0.1'):
+        self.datagrams = datagrams
+        self.start_id = start_id
+        self.rate = rate
+        self.host = host
+        self.sent_at: Dict[int, float] = {}
+        self.heartbeats = 0
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.bind((host, TelemetryReader.SEND_PORT))
+        self._socket.settimeout(0.1)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def wait(self, timeout: Optional[float] = None):
+        self._thread.join(timeout)
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self._socket.close()
+
+    def _drain_heartbeats(self) -> str:
+        try:
+            data, (reader_host, _) = self._socket.recvfrom(16)
+            if data == b'A':
+                self.heartbeats += 1
+                return reader_host
+        except (socket.timeout, BlockingIOError):
+            pass
+        return ''
+
+    def _run(self):
+        reader_host = ''
+        while not reader_host and not self._stop.is_set():
+            reader_host = self._drain_heartbeats()
+        self._socket.setblocking(False)
+
+        interval = 1.0 / self.rate if self.rate else 0.0
+        next_send = time.perf_counter()
+        for index, datagram in enumerate(self.datagrams):
+            if self._stop.is_set():
+                break
+            if interval:
+                delay = next_send - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                next_send += interval
+            self.sent_at[self.start_id + index] = time.perf_counter()
+            self._socket.sendto(datagram, (reader_host, TelemetryReader.RECEIVE_PORT))
+            self._drain_heartbeats()
+
@@ -0,0 +1,328 @@
+# End-to-End Benchmark Suite
+"""
+    Benchmarks the ingest-to-WebSocket pipeline stage by stage.
+
+    Run from the backend directory:
+        python -m benchmarks.run --packets 20000 --output results.json
+        python -m benchmarks.run --baseline results.json  # exit code 1 on regression
+        BUS_ENABLED=true python -m benchmarks.run --stages websocket --clients 8
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import shutil
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from telemetry.reader import TelemetryReader
+from telemetry.parser import TelemetryParser
+from telemetry.jitter import JitterBuffer
+from .datagrams import FakeConsole, generate_datagrams
+
+MEMORY_SAMPLE = 1000  # packets replayed under tracemalloc to estimate per-stage memory
+
+
+def _latency_summary(latencies: List[float]) -> Dict[str, float]:
+    if not latencies:
+        return {}
+    latencies = sorted(latencies)
+    return {
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[min(int(len(latencies) * 0.99), len(latencies) - 1)] * 1000,
+        "max_ms": latencies[-1] * 1000,
+    }
+
+
+def _peak_memory_kb(run: Callable[[int], Any]) -> float:
+    tracemalloc.start()
+    try:
+        run(MEMORY_SAMPLE)
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def _measure(run: Callable[[int], Any], count: int) -> Dict[str, Any]:
+    """Time a micro stage over `count` packets, then sample its peak memory separately."""
+    wall, cpu = time.perf_counter(), time.process_time()
+    run(count)
+    wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+    return {
+        "packets": count,
+        "seconds": wall,
+        "packets_per_sec": count / wall if wall else 0.0,
+        "cpu_seconds": cpu,
+        "cpu_us_per_packet": cpu / count * 1e6 if count else 0.0,
+        "peak_memory_kb": _peak_memory_kb(run),
+    }
+
+
+def bench_micro_stages(datagrams: List[bytes]) -> Dict[str, Dict[str, Any]]:
+    """Decrypt, parse, jitter buffer and serialization in isolation."""
+    reader = TelemetryReader('127.0.0.1')
+    decrypted = [reader._decrypt_packet(datagram) for datagram in datagrams]
+    packets = [TelemetryParser().parse(data) for data in decrypted]
+
+    # swap neighbouring packets to simulate out of order delivery
+    shuffled = list(packets)
+    for index in range(0, len(shuffled) - 1, 10):
+        shuffled[index], shuffled[index + 1] = shuffled[index + 1], shuffled[index]
+
+    def decrypt(count):
+        for datagram in datagrams[:count]:
+            reader._decrypt_packet(datagram)
+
+    def parse(count):
+        parser = TelemetryParser()
+        for data in decrypted[:count]:
+            parser.parse(data)
+
+    jitter_stats = {}
+
+    def jitter(count):
+        buffer = JitterBuffer(latency=0.05)
+        for index, packet in enumerate(shuffled[:count]):
+            now = index / 60
+            buffer.push(packet, now=now)
+            buffer.pop_ready(now=now)
+        buffer.flush()
+        jitter_stats.update(buffer.stats())
+
+    def serialize(count):
+        for packet in packets[:count]:
+            json.dumps(packet.dict())
+
+    results = {
+        "decrypt": _measure(decrypt, len(datagrams)),
+        "parse": _measure(parse, len(datagrams)),
+        "jitter": _measure(jitter, len(datagrams)),
+        "serialize": _measure(serialize, len(datagrams)),
+    }
+    results["jitter"]["buffer"] = jitter_stats
+    return results
+
+
+def _rss_kb() -> float:
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024 if sys.platform == 'darwin' else rss
+
+
+async def bench_reader(datagrams: List[bytes], rate: float) -> Dict[str, Any]:
+    """Full TelemetryReader over localhost UDP, latency from console send to parsed packet."""
+    console = FakeConsole(datagrams, rate=rate)
+    reader = TelemetryReader('127.0.0.1')
+    latencies = []
+    rss_before = _rss_kb()
+
+    async def consume():
+        async for packet in reader.stream():
+            sent = console.sent_at.get(packet.packet_id)
+            if sent is not None:
+                latencies.append(time.perf_counter() - sent)
+            if packet.packet_id >= len(datagrams):
+                break
+
+    console.start()
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        await asyncio.wait_for(consume(), timeout=len(datagrams) / rate + 10 if rate else 30)
+    except asyncio.TimeoutError:
+        pass  # trailing packets were lost, count what arrived
+    finally:
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+        reader.close()
+        console.stop()
+
+    return {
+        "packets": len(latencies),
+        "lost": len(datagrams) - len(latencies),
+        "seconds": wall,
+        "packets_per_sec": len(latencies) / wall if wall else 0.0,
+        "cpu_seconds": cpu,
+        "rss_growth_kb": _rss_kb() - rss_before,
+        "latency": _latency_summary(latencies),
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+async def bench_websocket(datagrams: List[bytes], rate: float, clients: int) -> Dict[str, Any]:
+    """
+        /ws/telemetry end to end: fake console -> reader -> parser -> K WebSocket clients,
+        latency from console send to client receive.
+    """
+    import multiprocessing
+    import uvicorn
+    import websockets
+    # record laps (part of the pipeline) into a throwaway database instead of the real laps.db,
+    # and lift the admission limits, every client connects from 127.0.0.1
+    work_dir = tempfile.mkdtemp(prefix="gt7-bench-")
+    os.environ.update({
+        "LAP_DB_PATH": os.path.join(work_dir, "laps.db"),
+        "MAX_CONNECTIONS": "0",
+        "MAX_CONNECTIONS_PER_IP": "0",
+        "MAX_VIEWERS_PER_CONSOLE": "0",
+    })
+    if os.environ.get("BUS_ENABLED", "").lower() in ("1", "true"):
+        os.environ["BUS_SOCKET_PATH"] = os.path.join(work_dir, "bus.sock")
+    from main import app, run_ingest, settings
+
+    # with BUS_ENABLED=true the reader runs in a separate ingest process, like production
+    ingest = None
+    if settings.BUS_ENABLED:
+        ingest = multiprocessing.Process(target=run_ingest, daemon=True)
+        ingest.start()
+        await asyncio.sleep(1)
+
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host='127.0.0.1', port=port, log_level='warning'))
+    server_thread = threading.Thread(target=server.run, daemon=True)
+    server_thread.start()
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    console = FakeConsole(datagrams, rate=rate)
+    latencies: List[List[float]] = [[] for _ in range(clients)]
+    rejected = disconnected = 0
+    last_id = len(datagrams)
+    rss_before = _rss_kb()
+
+    async def client(index: int):
+        nonlocal rejected, disconnected
+        async with websockets.connect(f'ws://127.0.0.1:{port}/ws/telemetry', max_size=None) as ws:
+            await ws.send('127.0.0.1')
+            async for message in ws:
+                received = time.perf_counter()
+                data = json.loads(message)
+                if 'error' in data:
+                    rejected += 1
+                    return
+                packet_id = data.get('packet_id')
+                if packet_id is None:
+                    continue  # heartbeat
+                sent = console.sent_at.get(packet_id)
+                if sent is not None:
+                    latencies[index].append(received - sent)
+                if packet_id >= last_id:
+                    return
+        # server closed the connection before the last packet arrived
+        disconnected += 1
+
+    console.start()
+    wall, cpu = time.perf_counter(), time.process_time()
+    tasks = [asyncio.create_task(client(index)) for index in range(clients)]
+    try:
+        done, pending = await asyncio.wait(tasks, timeout=len(datagrams) / rate + 10 if rate else 30)
+        for task in pending:
+            task.cancel()
+        failed = sum(1 for task in done if task.exception() is not None)
+    finally:
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+        console.stop()
+        server.should_exit = True
+        server_thread.join(timeout=5)
+        if ingest:
+            ingest.terminate()
+            ingest.join(timeout=5)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    received = [len(client_latencies) for client_latencies in latencies]
+    return {
+        "clients": clients,
+        "bus": settings.BUS_ENABLED,
+        "rejected": rejected,
+        "disconnected": disconnected,
+        "failed": failed,
+        "packets": sum(received),
+        "packets_per_client": received,
+        "seconds": wall,
+        "packets_per_sec": sum(received) / wall if wall else 0.0,
+        "cpu_seconds": cpu,
+        "rss_growth_kb": _rss_kb() - rss_before,
+        "latency": _latency_summary([latency for client_latencies in latencies for latency in client_latencies]),
+    }
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Regressions against a baseline: throughput drops or p99 latency rises beyond the tolerance."""
+    regressions = []
+    for stage, current in results["stages"].items():
+        previous = baseline.get("stages", {}).get(stage)
+        if not previous:
+            continue
+        if previous.get("packets_per_sec") and \
+                current.get("packets_per_sec", 0) < previous["packets_per_sec"] * (1 - tolerance):
+            regressions.append(
+                f"{stage}: {current['packets_per_sec']:.0f} packets/sec, baseline {previous['packets_per_sec']:.0f}"
+            )
+        p99, previous_p99 = current.get("latency", {}).get("p99_ms"), previous.get("latency", {}).get("p99_ms")
+        if p99 is not None and previous_p99 and p99 > previous_p99 * (1 + tolerance):
+            regressions.append(f"{stage}: p99 {p99:.2f} ms, baseline {previous_p99:.2f} ms")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    arg_parser = argparse.ArgumentParser(description="Benchmark the GT7 ingest-to-WebSocket pipeline")
+    arg_parser.add_argument("--packets", type=int, default=10_000, help="datagrams per stage")
+    arg_parser.add_argument("--rate", type=float, default=1000.0, help="console send rate for live stages (packets/sec)")
+    arg_parser.add_argument("--clients", type=int, default=1, help="simulated WebSocket clients")
+    arg_parser.add_argument("--stages", default="micro,reader,websocket", help="comma separated: micro,reader,websocket")
+    arg_parser.add_argument("--output", help="write JSON results to this file")
+    arg_parser.add_argument("--baseline", help="JSON results to compare against")
+    arg_parser.add_argument("--tolerance", type=float, default=0.2, help="allowed regression fraction")
+    args = arg_parser.parse_args(argv)
+
+    datagrams = generate_datagrams(args.packets)
+    stages = set(args.stages.split(","))
+
+    results: Dict[str, Any] = {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "packets": args.packets,
+            "rate": args.rate,
+            "clients": args.clients,
+        },
+        "stages": {},
+    }
+
+    if "micro" in stages:
+        results["stages"].update(bench_micro_stages(datagrams))
+    if "reader" in stages:
+        results["stages"]["reader"] = asyncio.run(bench_reader(datagrams, args.rate))
+    if "websocket" in stages:
+        results["stages"]["websocket"] = asyncio.run(bench_websocket(datagrams, args.rate, args.clients))
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
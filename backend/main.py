@@ -1,15 +1,33 @@
+import hmac
+import os
 import sys
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
+import multiprocessing
+import tempfile
+from pathlib import Path
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Header, Depends, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, PlainTextResponse
+from starlette.background import BackgroundTask
 from loguru import logger
 import uvicorn
 import asyncio
 from datetime import datetime
-from typing import Dict
+from typing import AsyncGenerator, Optional, Tuple
 
 from telemetry.reader import TelemetryReader
+from telemetry.connections import ConnectionManager
+from telemetry.models import TelemetryPacket
+from telemetry.bus import TelemetryBusServer, TelemetryBusClient, TelemetryHub
+from telemetry.jitter import JitterBuffer, jitter_stream
+from telemetry.recorder import SessionRecorder
+from telemetry.export import FORMATS, export_session, parse_lap_range
+from telemetry.lap_compare import compare_laps
+from telemetry.lap_store import LapStore, track_laps
+from telemetry.tire_thermal import TireThermalTracker
+from telemetry.profiling import profiler
+from telemetry.log_limiter import rate_limited_logger
 from app_config.config import settings
-from app_config.validators import validate_ps_ip
+from app_config.validators import validate_ps_ip, validate_session_name
 
 app = FastAPI(
     title="GT7 Telemetry Server",
@@ -33,77 +51,215 @@ logger.add(
     level=settings.LOG_LEVEL,
     rotation="500 MB",
     retention="10 days",
+    enqueue=settings.LOG_ENQUEUE,
     backtrace=True,
-    diagnose=True
+    diagnose=settings.LOG_DIAGNOSE
 )
-logger.add(sys.stderr, level=settings.LOG_LEVEL)
+logger.add(sys.stderr, level=settings.LOG_LEVEL, enqueue=settings.LOG_ENQUEUE)
+rate_limited_logger.configure(
+    interval=settings.LOG_RATE_LIMIT_INTERVAL,
+    burst=settings.LOG_RATE_LIMIT_BURST
+)
+
+profiler.set_sample_rate(settings.PROFILE_SAMPLE_RATE)
+
+
+# laps are written by whichever process reads the console, any worker can query them
+lap_store = LapStore(settings.LAP_DB_PATH) if settings.LAP_DB_ENABLED else None
+
 
+@app.get("/health")
+async def health_check():
+    """Health check endpoint"""
+    return {
+        "status": "healthy",
+        "timestamp": datetime.utcnow().isoformat(),
+        "active_connections": len(manager.active_connections)
+    }
 
-# track active connections
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: Dict[str, dict] = {}
 
-    async def connect(self, client_id: str, websocket: WebSocket, telemetry: TelemetryReader):
-        await self.disconnect(client_id)  # ensure cleanup of any existing connection
-        self.active_connections[client_id] = {
-            'websocket': websocket,
-            'telemetry': telemetry,
-            'tasks': set()
+@app.get("/metrics")
+async def metrics():
+    """Telemetry metrics per console, connections and admission"""
+    result = {
+        "timestamp": datetime.utcnow().isoformat(),
+        "suppressed_log_messages": rate_limited_logger.suppressed(),
+        "admission": manager.stats(),
+        "connections": {
+            client_id: {"ps_ip": connection['ps_ip']}
+            for client_id, connection in manager.active_connections.items()
         }
+    }
+    if hub:
+        result["hub"] = hub.stats()
+    if lap_store:
+        result["lap_store"] = lap_store.stats()
+    if bus_client:
+        try:
+            result["bus"] = await bus_client.stats()
+        except OSError as e:
+            result["bus"] = {"error": str(e)}
+    return result
 
-    async def disconnect(self, client_id: str):
-        if client_id in self.active_connections:
-            connection = self.active_connections[client_id]
 
-            # cancel all tasks
-            tasks = connection.get('tasks', set())
-            for task in tasks:
-                try:
-                    task.cancel()
-                    try:
-                        await task
-                    except asyncio.CancelledError:
-                        pass
-                except Exception as e:
-                    logger.error(f"Error cancelling task for {client_id}: {str(e)}")
+@app.get("/sessions")
+async def list_sessions():
+    """List recorded sessions"""
+    directory = Path(settings.RECORDINGS_DIR)
+    files = sorted(directory.glob(f"*{SessionRecorder.EXTENSION}")) if directory.exists() else []
+    return {
+        "sessions": [
+            {"name": f.name, "size_bytes": f.stat().st_size} for f in files
+        ]
+    }
 
-            # close telemetry
-            telemetry = connection.get('telemetry')
-            if telemetry:
-                telemetry.close()
 
-            # close websocket
-            websocket = connection.get('websocket')
-            if websocket:
-                try:
-                    await websocket.close()
-                except Exception as e:
-                    logger.error(f"Error closing websocket for {client_id}: {str(e)}")
+@app.get("/sessions/{name}/export")
+async def export_recorded_session(name: str, format: str = "csv", fields: Optional[str] = None,
+                                  laps: Optional[str] = None):
+    """Export a recorded session to CSV or Parquet"""
+    try:
+        path = Path(settings.RECORDINGS_DIR) / validate_session_name(name)
+        lap_range = parse_lap_range(laps) if laps else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if format not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported export format: {format}")
+    if not path.exists():
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    fd, output = tempfile.mkstemp(suffix=f".{format}")
+    os.close(fd)
+    output = Path(output)
+    try:
+        # export runs off the event loop, memory stays bounded by the batch size
+        await asyncio.to_thread(
+            export_session, path, output, fmt=format,
+            fields=fields.split(",") if fields else None, laps=lap_range
+        )
+    except (ValueError, RuntimeError) as e:
+        output.unlink(missing_ok=True)
+        raise HTTPException(status_code=400, detail=str(e))
 
-            # remove from active connections
-            self.active_connections.pop(client_id)
-            logger.info(f"Disconnected client: {client_id}")
+    return FileResponse(
+        output,
+        filename=f"{path.stem}.{format}",
+        background=BackgroundTask(output.unlink, missing_ok=True)
+    )
 
-    def add_task(self, client_id: str, task: asyncio.Task):
-        if client_id in self.active_connections:
-            self.active_connections[client_id]['tasks'].add(task)
 
-    def is_connected(self, client_id: str) -> bool:
-        return client_id in self.active_connections
+def require_lap_store() -> LapStore:
+    if lap_store is None:
+        raise HTTPException(status_code=404, detail="Lap database is disabled")
+    return lap_store
 
 
-manager = ConnectionManager()
+@app.get("/laps/best")
+async def best_laps(car_id: Optional[int] = None, limit: int = Query(10, ge=1, le=1000),
+                    store: LapStore = Depends(require_lap_store)):
+    """Fastest recorded laps, optionally for one car"""
+    return {"laps": await asyncio.to_thread(store.best_laps, car_id=car_id, limit=limit)}
 
 
-@app.get("/health")
-async def health_check():
-    """Health check endpoint"""
+@app.get("/laps/sessions")
+async def recent_lap_sessions(limit: int = Query(5, ge=1, le=1000), ps_ip: Optional[str] = None,
+                              car_id: Optional[int] = None, store: LapStore = Depends(require_lap_store)):
+    """Last N sessions with lap count, best/average lap time and fuel per lap"""
     return {
-        "status": "healthy",
-        "timestamp": datetime.utcnow().isoformat(),
-        "active_connections": len(manager.active_connections)
+        "sessions": await asyncio.to_thread(store.recent_sessions, limit=limit, ps_ip=ps_ip, car_id=car_id)
+    }
+
+
+@app.get("/laps/sessions/{session_id}")
+async def lap_session_laps(session_id: str, store: LapStore = Depends(require_lap_store)):
+    """Every lap of one session"""
+    laps = await asyncio.to_thread(store.session_laps, session_id)
+    if not laps:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return {"laps": laps}
+
+
+@app.get("/sessions/compare")
+async def compare_recorded_laps(session: str, lap: int, reference_lap: int, reference_session: Optional[str] = None,
+                                resolution: float = Query(1.0, ge=0.1, le=100),
+                                occurrence: int = -1, reference_occurrence: int = -1):
+    """Align a recorded lap with a reference lap by distance for an overlay view"""
+    try:
+        path = Path(settings.RECORDINGS_DIR) / validate_session_name(session)
+        reference_path = Path(settings.RECORDINGS_DIR) / validate_session_name(reference_session or session)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not path.exists() or not reference_path.exists():
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    try:
+        return await asyncio.to_thread(compare_laps, path, lap, reference_path, reference_lap, resolution=resolution,
+                                       occurrence=occurrence, reference_occurrence=reference_occurrence)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+async def verify_admin_token(x_admin_token: Optional[str] = Header(None)):
+    """Require the admin token on /admin endpoints, which stay disabled until one is configured"""
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Admin endpoints are disabled, set ADMIN_TOKEN")
+    if not hmac.compare_digest((x_admin_token or "").encode(), settings.ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+async def ingest_profile(sample_rate: Optional[float] = None, reset: bool = False) -> dict:
+    """Profile of the ingest process, which runs decrypt and parse in bus mode"""
+    try:
+        return await bus_client.profile(sample_rate, reset)
+    except OSError as e:
+        raise HTTPException(status_code=503, detail=f"Telemetry bus unavailable: {e}")
+
+
+# The profiler is per process: with WORKERS > 1 these requests reach whichever worker accepts them,
+# so "send" timings and sample rate changes only cover that worker. In bus mode the ingest stages
+# are fetched from (and configured in) the ingest process over the bus.
+@app.get("/admin/profile", dependencies=[Depends(verify_admin_token)])
+async def get_profile(format: str = "json"):
+    """Per-stage timings of sampled packets, as a histogram or collapsed stacks for flamegraphs"""
+    if format not in ("json", "collapsed"):
+        raise HTTPException(status_code=400, detail="Format must be 'json' or 'collapsed'")
+    ingest = await ingest_profile() if bus_client else None
+    if format == "collapsed":
+        stacks = [profiler.collapsed()] + ([ingest["collapsed"]] if ingest else [])
+        return PlainTextResponse("\n".join(stack for stack in stacks if stack))
+    result = {
+        "sample_rate": profiler.sample_rate,
+        "stages": profiler.histogram()
     }
+    if ingest:
+        result["ingest"] = {"sample_rate": ingest["sample_rate"], "stages": ingest["stages"]}
+    return result
+
+
+@app.post("/admin/profile", dependencies=[Depends(verify_admin_token)])
+async def configure_profile(sample_rate: float, reset: bool = False):
+    """Change the profiling sample rate at runtime (0 disables profiling)"""
+    try:
+        profiler.set_sample_rate(sample_rate)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if reset:
+        profiler.reset()
+    result = {"sample_rate": profiler.sample_rate}
+    if bus_client:
+        result["ingest_sample_rate"] = (await ingest_profile(sample_rate, reset))["sample_rate"]
+    return result
+
+
+@app.delete("/admin/profile", dependencies=[Depends(verify_admin_token)])
+async def reset_profile():
+    """Discard collected profiling data"""
+    profiler.reset()
+    if bus_client:
+        await ingest_profile(reset=True)
+    return {"status": "reset"}
 
 
 async def send_websocket_heartbeat(websocket: WebSocket, client_id: str):
@@ -117,19 +273,117 @@ async def send_websocket_heartbeat(websocket: WebSocket, client_id: str):
             break
 
 
+def open_telemetry_stream(ps_ip: str) -> Tuple[TelemetryReader, AsyncGenerator[TelemetryPacket, None]]:
+    """Create the reader for a console and its packet stream with the configured pipeline stages"""
+    telemetry = TelemetryReader(
+        ps_ip,
+        heartbeat_interval=settings.GT7_HEARTBEAT_INTERVAL_S,
+        socket_timeout=settings.GT7_SOCKET_TIMEOUT,
+        idle_output_interval=settings.GT7_IDLE_OUTPUT_INTERVAL,
+        derived_channels=settings.DERIVED_CHANNELS_ENABLED,
+        recorder=(
+            SessionRecorder.for_console(settings.RECORDINGS_DIR, ps_ip)
+            if settings.RECORDING_ENABLED else None
+        )
+    )
+
+    stream = telemetry.stream()
+    if lap_store:
+        stream = track_laps(lap_store, ps_ip, stream)
+    if settings.JITTER_BUFFER_ENABLED:
+        # kept on the reader so the added latency shows up in /metrics
+        telemetry.jitter_buffer = JitterBuffer(latency=settings.JITTER_LATENCY_MS / 1000)
+        stream = jitter_stream(stream, telemetry.jitter_buffer, output_rate=settings.JITTER_OUTPUT_RATE)
+    return telemetry, stream
+
+
+def create_tire_tracker() -> TireThermalTracker:
+    return TireThermalTracker(
+        optimal_min=settings.TIRE_OPTIMAL_MIN,
+        optimal_max=settings.TIRE_OPTIMAL_MAX,
+        time_constant=settings.TIRE_TREND_TIME_CONSTANT,
+        summary_interval=settings.TIRE_SUMMARY_INTERVAL
+    )
+
+
+# one reader per console, shared by every /ws/telemetry and /ws/tires viewer of it: in bus mode the
+# ingest process owns the UDP sockets and workers subscribe to it, otherwise this process does
+bus_client = TelemetryBusClient(settings.BUS_SOCKET_PATH) if settings.BUS_ENABLED else None
+hub = None if bus_client else TelemetryHub(
+    open_telemetry_stream,
+    queue_size=settings.BUS_QUEUE_SIZE,
+    tire_tracker=create_tire_tracker
+)
+
+manager = ConnectionManager(
+    max_connections=settings.MAX_CONNECTIONS,
+    max_per_ip=settings.MAX_CONNECTIONS_PER_IP,
+    max_per_console=settings.MAX_VIEWERS_PER_CONSOLE,
+    idle_timeout=settings.WS_IDLE_TIMEOUT,
+    last_packet_time=hub.last_packet_time if hub else None
+)
+
+
+async def stream_messages(websocket: WebSocket, client_id: str, ps_ip: str, topic: str = "packets"):
+    """Forward packets (or tire summaries) serialized once per console by the hub or the ingest process"""
+    messages = bus_client.subscribe(ps_ip, topic) if bus_client else hub.messages(ps_ip, topic)
+    try:
+        async for message in messages:
+            if not manager.is_connected(client_id):
+                break
+            sample = profiler.sample('send')
+            await websocket.send_text(message)
+            manager.touch(client_id)
+            if sample:
+                sample.end()
+    finally:
+        await messages.aclose()
+
+
 @app.websocket("/ws/telemetry")
 async def websocket_endpoint(websocket: WebSocket):
     """WebSocket endpoint for telemetry data streaming"""
+    await serve_console(websocket)
+
+
+@app.websocket("/ws/tires")
+async def tire_websocket_endpoint(websocket: WebSocket):
+    """WebSocket endpoint for tire thermal summaries"""
+    await serve_console(websocket, tires=True)
+
+
+async def reject_connection(websocket: WebSocket, client_id: str, message: str):
+    """Tell a client why it wasn't admitted and close with 'try again later'"""
+    logger.warning(f"Rejected connection from {client_id}: {message}")
+    try:
+        await websocket.send_json({"error": message})
+        await websocket.close(code=1013)
+    except Exception:
+        pass
+
+
+async def serve_console(websocket: WebSocket, tires: bool = False):
+    """Accept a connection, read the PlayStation IP and stream packets or tire summaries"""
     client_id = f"{websocket.client.host}:{websocket.client.port}"
 
     try:
         await websocket.accept()
         logger.info(f"New WebSocket connection attempt from: {client_id}")
 
+        # connections count against the limits from here, before any resources are allocated
+        rejection = manager.connect(client_id, websocket.client.host, websocket)
+        if rejection:
+            await reject_connection(websocket, client_id, rejection)
+            return
+
         # Get PlayStation IP from initial connection message
         try:
-            data = await websocket.receive_text()
+            data = await asyncio.wait_for(websocket.receive_text(), timeout=settings.WS_HANDSHAKE_TIMEOUT or None)
             ps_ip = validate_ps_ip(data)
+        except asyncio.TimeoutError:
+            manager.evicted["handshake_timeout"] += 1
+            await websocket.send_json({"error": "Timed out waiting for the PlayStation IP"})
+            return
         except ValueError as e:
             await websocket.send_json({"error": str(e)})
             return
@@ -137,9 +391,10 @@ async def websocket_endpoint(websocket: WebSocket):
             logger.error(f"Error receiving PS IP from {client_id}: {str(e)}")
             return
 
-        # initialize telemetry reader
-        telemetry = TelemetryReader(ps_ip)
-        await manager.connect(client_id, websocket, telemetry)
+        rejection = manager.attach(client_id, ps_ip)
+        if rejection:
+            await reject_connection(websocket, client_id, rejection)
+            return
 
         # start heartbeat
         heartbeat_task = asyncio.create_task(
@@ -149,15 +404,18 @@ async def websocket_endpoint(websocket: WebSocket):
 
         logger.info(f"Telemetry connection established for {client_id} with PS IP: {ps_ip}")
 
-        # start telemetry streaming
-        try:
-            async for telemetry_data in telemetry.stream():
-                if not manager.is_connected(client_id):
-                    break
-                await websocket.send_json(telemetry_data.dict())
-        except Exception as e:
-            logger.error(f"Error in telemetry stream for {client_id}: {str(e)}")
-            raise
+        # start telemetry streaming as a task so idle eviction can cancel it
+        stream_task = asyncio.create_task(
+            stream_messages(websocket, client_id, ps_ip, "tires" if tires else "packets")
+        )
+        manager.add_task(client_id, stream_task)
+        await asyncio.wait({stream_task})
+
+        if not stream_task.cancelled() and stream_task.exception():
+            e = stream_task.exception()
+            if not isinstance(e, WebSocketDisconnect):
+                logger.error(f"Error in telemetry stream for {client_id}: {str(e)}")
+            raise e
 
     except WebSocketDisconnect:
         logger.info(f"Client disconnected: {client_id}")
@@ -171,21 +429,67 @@ async def websocket_endpoint(websocket: WebSocket):
 async def startup_event():
     """Initialize application resources"""
     logger.info("Starting GT7 Telemetry Server")
+    app.state.eviction_task = asyncio.create_task(manager.evict_idle())
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup application resources"""
     logger.info("Shutting down GT7 Telemetry Server")
+    app.state.eviction_task.cancel()
     # clean up all active connections
     for client_id in list(manager.active_connections.keys()):
         await manager.disconnect(client_id)
+    if hub:
+        await hub.close()
+
+    if lap_store:
+        await asyncio.to_thread(lap_store.close)
+
+    # flush anything still queued for the log sinks
+    await logger.complete()
+
+
+def run_ingest():
+    """Run the ingest process: owns the GT7 UDP sockets and publishes packets on the telemetry bus"""
+    bus = TelemetryBusServer(
+        settings.BUS_SOCKET_PATH,
+        open_telemetry_stream,
+        queue_size=settings.BUS_QUEUE_SIZE,
+        max_subscribers=settings.MAX_VIEWERS_PER_CONSOLE,
+        tire_tracker=create_tire_tracker
+    )
+    try:
+        asyncio.run(bus.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if lap_store:
+            lap_store.close()
 
 
 if __name__ == "__main__":
-    uvicorn.run(
-        "main:app",
-        host=settings.HOST,
-        port=settings.PORT,
-        reload=settings.DEBUG
-    )
\ No newline at end of file
+    # `python main.py ingest` runs only the ingest process, e.g. under its own supervisor
+    if sys.argv[1:] == ["ingest"]:
+        run_ingest()
+        sys.exit(0)
+
+    ingest = None
+    if settings.BUS_ENABLED and settings.BUS_START_INGEST:
+        ingest = multiprocessing.Process(target=run_ingest, name="gt7-ingest", daemon=True)
+        ingest.start()
+    elif settings.WORKERS > 1:
+        logger.warning("WORKERS > 1 without BUS_ENABLED, only one worker can read a console at a time")
+
+    try:
+        uvicorn.run(
+            "main:app",
+            host=settings.HOST,
+            port=settings.PORT,
+            reload=settings.DEBUG,
+            workers=None if settings.DEBUG else settings.WORKERS,
+            ws_max_size=settings.WS_MAX_MESSAGE_SIZE
+        )
+    finally:
+        if ingest:
+            ingest.terminate()
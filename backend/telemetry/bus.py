@@ -0,0 +1,327 @@
+# Telemetry Hub and Bus (one reader per console -> many viewers, in process or across workers)
+import asyncio
+import json
+import os
+from typing import AsyncGenerator, AsyncIterator, Callable, Dict, Optional, Set, Tuple
+
+from loguru import logger
+
+from .models import TelemetryPacket
+from .profiling import profiler
+from .reader import TelemetryReader
+from .tire_thermal import TireThermalTracker
+from .log_limiter import rate_limited_logger
+
+# (reader, packet stream) for a console, so the hub can apply the same pipeline as main.py
+StreamFactory = Callable[[str], Tuple[TelemetryReader, AsyncIterator[TelemetryPacket]]]
+
+LINE_LIMIT = 1 << 20  # max bytes per message line
+TOPICS = ("packets", "tires")  # every packet, or about one tire thermal summary per second
+
+
+class _Subscriber:
+    """A subscription to one console and topic, with a bounded send queue."""
+
+    def __init__(self, queue_size: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+
+    def offer(self, payload: bytes):
+        """Queue a message, dropping the oldest one if this subscriber is falling behind."""
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(payload)
+
+
+class _Console:
+    def __init__(self, ps_ip: str):
+        self.ps_ip = ps_ip
+        self.reader: Optional[TelemetryReader] = None
+        self.task: Optional[asyncio.Task] = None
+        self.topics: Dict[str, Set[_Subscriber]] = {topic: set() for topic in TOPICS}
+        self.tires: Optional[TireThermalTracker] = None
+        self.published = 0
+
+    @property
+    def subscribers(self) -> Set[_Subscriber]:
+        return set().union(*self.topics.values())
+
+
+class TelemetryHub:
+    """
+        Shares one TelemetryReader per console between all of its subscribers: each packet is
+        serialized once and fanned out, and tire thermal summaries are computed once per console
+        for the "tires" topic. The reader is opened with the first subscriber and closed with the
+        last. A single process server uses a hub directly; in bus mode the ingest process runs
+        one behind a TelemetryBusServer.
+
+        max_subscribers caps the subscribers per console (0 = unlimited).
+    """
+
+    def __init__(self, open_stream: StreamFactory, queue_size: int = 256, max_subscribers: int = 0,
+                 tire_tracker: Callable[[], TireThermalTracker] = TireThermalTracker):
+        self.open_stream = open_stream
+        self.tire_tracker = tire_tracker
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self.rejected = 0
+        self._consoles: Dict[str, _Console] = {}
+
+    async def close(self):
+        for console in list(self._consoles.values()):
+            await self._stop_console(console)
+
+    def stats(self) -> dict:
+        return {
+            "rejected": self.rejected,
+            "consoles": {
+                ps_ip: {
+                    "subscribers": len(console.subscribers),
+                    "tire_subscribers": len(console.topics["tires"]),
+                    "published": console.published,
+                    "dropped": sum(subscriber.dropped for subscriber in console.subscribers),
+                    "reader": console.reader.metrics() if console.reader else None,
+                }
+                for ps_ip, console in self._consoles.items()
+            }
+        }
+
+    def last_packet_time(self, ps_ip: str) -> Optional[float]:
+        """When the console's reader last received a datagram, including idle ones it doesn't publish."""
+        console = self._consoles.get(ps_ip)
+        return console.reader.last_packet_time if console and console.reader else None
+
+    async def subscribe(self, ps_ip: str, topic: str = "packets") -> AsyncGenerator[bytes, None]:
+        """
+            Yield newline terminated JSON messages for a console: packets, or tire summaries for
+            the "tires" topic. A rejection or a failing stream is reported as an {"error": ...} line.
+        """
+        if topic not in TOPICS:
+            raise ValueError(f"Unknown topic {topic}")
+        console = self._consoles.get(ps_ip)
+        if console and self.max_subscribers and len(console.subscribers) >= self.max_subscribers:
+            self.rejected += 1
+            yield b'{"error": "Too many viewers for this PlayStation"}\n'
+            return
+        if console is None:
+            console = self._consoles[ps_ip] = _Console(ps_ip)
+            console.task = asyncio.create_task(self._run_console(console))
+
+        subscriber = _Subscriber(self.queue_size)
+        subscribers = console.topics[topic]
+        if topic == "tires" and not subscribers:
+            console.tires = self.tire_tracker()
+        subscribers.add(subscriber)
+        logger.info("{} subscriber added for {} ({} total)", topic.capitalize(), ps_ip, len(console.subscribers))
+
+        try:
+            while True:
+                payload = await subscriber.queue.get()
+                if payload is None:
+                    break
+                yield payload
+        finally:
+            subscribers.discard(subscriber)
+            if not console.subscribers and self._consoles.get(ps_ip) is console:
+                await self._stop_console(console)
+
+    async def messages(self, ps_ip: str, topic: str = "packets") -> AsyncGenerator[str, None]:
+        """subscribe() as text messages, for sending straight to a WebSocket."""
+        payloads = self.subscribe(ps_ip, topic)
+        try:
+            async for payload in payloads:
+                yield payload.decode().rstrip("\n")
+        finally:
+            await payloads.aclose()
+
+    async def _run_console(self, console: _Console):
+        """Read one console and publish every packet to its subscribers."""
+        try:
+            console.reader, stream = self.open_stream(console.ps_ip)
+            async for packet in stream:
+                if console.topics["packets"]:
+                    payload = packet.model_dump_json().encode() + b"\n"
+                    for subscriber in console.topics["packets"]:
+                        subscriber.offer(payload)
+                if console.topics["tires"] and console.tires:
+                    summary = console.tires.update(packet)
+                    if summary is not None:
+                        payload = summary.model_dump_json().encode() + b"\n"
+                        for subscriber in console.topics["tires"]:
+                            subscriber.offer(payload)
+                console.published += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            rate_limited_logger.error("hub", "Telemetry stream for {} failed: {}", console.ps_ip, e)
+            error = json.dumps({"error": str(e)}).encode() + b"\n"
+            for subscriber in console.subscribers:
+                subscriber.offer(error)
+        finally:
+            for subscriber in console.subscribers:
+                subscriber.offer(None)
+            if self._consoles.get(console.ps_ip) is console:
+                self._consoles.pop(console.ps_ip)
+
+    async def _stop_console(self, console: _Console):
+        self._consoles.pop(console.ps_ip, None)
+        if console.task:
+            console.task.cancel()
+            try:
+                await console.task
+            except asyncio.CancelledError:
+                pass
+        if console.reader:
+            console.reader.close()
+        logger.info("Stopped reading {}", console.ps_ip)
+
+
+class TelemetryBusServer:
+    """
+        Runs in the single ingest process. Owns a TelemetryHub (one TelemetryReader per console)
+        and fans its messages out over a Unix socket to every subscribed web worker.
+
+        Protocol (newline delimited JSON): a worker sends {"type": "subscribe", "ps_ip": ...}
+        and then receives one packet per line, or an {"error": ...} line if the stream fails.
+        With "topic": "tires" it receives tire thermal summaries instead, computed here once per
+        console so workers don't decode every packet to send one summary per second.
+        {"type": "stats"} returns a single line of bus statistics. {"type": "profile"} returns the
+        ingest process's stage profile (decrypt and parse run here, not in the workers), optionally
+        changing its "sample_rate" or discarding collected data with "reset" first.
+
+        max_subscribers caps the subscribers per console across all workers (0 = unlimited).
+    """
+
+    def __init__(self, path: str, open_stream: StreamFactory, queue_size: int = 256, max_subscribers: int = 0,
+                 tire_tracker: Callable[[], TireThermalTracker] = TireThermalTracker):
+        self.path = path
+        self.hub = TelemetryHub(open_stream, queue_size=queue_size, max_subscribers=max_subscribers,
+                                tire_tracker=tire_tracker)
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)  # stale socket from a previous run
+        self._server = await asyncio.start_unix_server(self._handle, path=self.path, limit=LINE_LIMIT)
+        logger.info("Telemetry bus listening on {}", self.path)
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.close()
+
+    async def close(self):
+        await self.hub.close()
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def stats(self) -> dict:
+        return self.hub.stats()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request = json.loads(await reader.readline() or b'{}')
+        except ValueError:
+            request = {}
+
+        try:
+            if request.get("type") == "stats":
+                writer.write(json.dumps(self.stats()).encode() + b"\n")
+                await writer.drain()
+            elif request.get("type") == "profile":
+                writer.write(json.dumps(self._profile(request)).encode() + b"\n")
+                await writer.drain()
+            elif request.get("type") == "subscribe" and request.get("ps_ip") and \
+                    request.get("topic", "packets") in TOPICS:
+                await self._subscribe(request["ps_ip"], request.get("topic", "packets"), reader, writer)
+            else:
+                writer.write(b'{"error": "Invalid bus request"}\n')
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _profile(request: dict) -> dict:
+        try:
+            if request.get("sample_rate") is not None:
+                profiler.set_sample_rate(float(request["sample_rate"]))
+        except (TypeError, ValueError) as e:
+            return {"error": str(e)}
+        if request.get("reset"):
+            profiler.reset()
+        return {
+            "sample_rate": profiler.sample_rate,
+            "stages": profiler.histogram(),
+            "collapsed": profiler.collapsed(),
+        }
+
+    async def _subscribe(self, ps_ip: str, topic: str, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        messages = self.hub.subscribe(ps_ip, topic)
+
+        async def pump():
+            async for payload in messages:
+                writer.write(payload)
+                await writer.drain()
+
+        forward = asyncio.create_task(pump())
+        # workers never send anything after subscribing, EOF means they went away
+        closed = asyncio.create_task(reader.read())
+        try:
+            await asyncio.wait({forward, closed}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            forward.cancel()
+            closed.cancel()
+            await asyncio.wait({forward})
+            await messages.aclose()
+
+
+class TelemetryBusClient:
+    """Used by web workers to receive already serialized packets from the ingest process."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    async def _request(self, request: dict) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        reader, writer = await asyncio.open_unix_connection(self.path, limit=LINE_LIMIT)
+        writer.write(json.dumps(request).encode() + b"\n")
+        await writer.drain()
+        return reader, writer
+
+    async def subscribe(self, ps_ip: str, topic: str = "packets") -> AsyncGenerator[str, None]:
+        """Yield JSON encoded packets (or tire summaries) for a console, one message per line."""
+        reader, writer = await self._request({"type": "subscribe", "ps_ip": ps_ip, "topic": topic})
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                yield line.decode().rstrip("\n")
+        finally:
+            writer.close()
+
+    async def stats(self) -> dict:
+        reader, writer = await self._request({"type": "stats"})
+        try:
+            return json.loads(await reader.readline() or b'{}')
+        finally:
+            writer.close()
+
+    async def profile(self, sample_rate: Optional[float] = None, reset: bool = False) -> dict:
+        """Stage profile of the ingest process, optionally changing its sample rate or resetting it."""
+        reader, writer = await self._request({"type": "profile", "sample_rate": sample_rate, "reset": reset})
+        try:
+            data = json.loads(await reader.readline() or b'{}')
+        finally:
+            writer.close()
+        if "error" in data:
+            raise ValueError(data["error"])
+        return data
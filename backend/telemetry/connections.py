@@ -0,0 +1,130 @@
+# WebSocket Connection Admission
+import asyncio
+import time
+from collections import Counter
+from typing import Callable, Dict, Optional
+
+from fastapi import WebSocket, WebSocketDisconnect
+from loguru import logger
+from starlette.websockets import WebSocketState
+
+
+class ConnectionManager:
+    """
+        Tracks WebSocket connections and admits new ones within the configured limits
+        (0 = unlimited): total connections, connections per client address and viewers per
+        console. Connections that stop receiving telemetry are evicted after idle_timeout.
+        Packets the console's reader receives count as activity, even idle ones that aren't
+        sent, when last_packet_time (ps_ip -> time.monotonic() of the last datagram) is given.
+    """
+
+    def __init__(self, max_connections: int = 0, max_per_ip: int = 0, max_per_console: int = 0,
+                 idle_timeout: float = 0, last_packet_time: Optional[Callable[[str], Optional[float]]] = None):
+        self.active_connections: Dict[str, dict] = {}
+        self.max_connections = max_connections
+        self.max_per_ip = max_per_ip
+        self.max_per_console = max_per_console
+        self.idle_timeout = idle_timeout
+        self.last_packet_time = last_packet_time
+        self.rejected: Counter = Counter()
+        self.evicted: Counter = Counter()
+
+    def _count(self, key: str, value: str) -> int:
+        return sum(1 for connection in self.active_connections.values() if connection[key] == value)
+
+    def _reject(self, reason: str, message: str) -> str:
+        self.rejected[reason] += 1
+        return message
+
+    def connect(self, client_id: str, host: str, websocket: WebSocket) -> Optional[str]:
+        """Register a new connection, returns an error message if it isn't admitted"""
+        if self.max_connections and len(self.active_connections) >= self.max_connections:
+            return self._reject("max_connections", "Server is at its connection limit")
+        if self.max_per_ip and self._count('host', host) >= self.max_per_ip:
+            return self._reject("max_per_ip", "Too many connections from this address")
+
+        self.active_connections[client_id] = {
+            'websocket': websocket,
+            'host': host,
+            'ps_ip': None,
+            'tasks': set(),
+            'last_activity': time.monotonic()
+        }
+        return None
+
+    def attach(self, client_id: str, ps_ip: str) -> Optional[str]:
+        """Assign the console a connection views, returns an error message if it has too many viewers"""
+        if self.max_per_console and self._count('ps_ip', ps_ip) >= self.max_per_console:
+            return self._reject("max_per_console", "Too many viewers for this PlayStation")
+        connection = self.active_connections[client_id]
+        connection['ps_ip'] = ps_ip
+        connection['last_activity'] = time.monotonic()
+        return None
+
+    async def disconnect(self, client_id: str):
+        # pop first so concurrent disconnects (eviction and the endpoint) only clean up once
+        connection = self.active_connections.pop(client_id, None)
+        if connection is not None:
+            # cancel all tasks
+            tasks = connection.get('tasks', set())
+            for task in tasks:
+                try:
+                    task.cancel()
+                    try:
+                        await task
+                    except asyncio.CancelledError:
+                        pass
+                except Exception as e:
+                    logger.error(f"Error cancelling task for {client_id}: {str(e)}")
+
+            # close websocket, a client that stopped reading can't hold this up
+            websocket = connection.get('websocket')
+            if websocket and websocket.application_state != WebSocketState.DISCONNECTED:
+                try:
+                    await asyncio.wait_for(websocket.close(), timeout=5)
+                except WebSocketDisconnect:
+                    pass  # client already went away
+                except Exception as e:
+                    logger.error(f"Error closing websocket for {client_id}: {e!r}")
+
+            logger.info(f"Disconnected client: {client_id}")
+
+    def add_task(self, client_id: str, task: asyncio.Task):
+        if client_id in self.active_connections:
+            self.active_connections[client_id]['tasks'].add(task)
+
+    def is_connected(self, client_id: str) -> bool:
+        return client_id in self.active_connections
+
+    def touch(self, client_id: str):
+        """Record that telemetry was delivered to a connection"""
+        connection = self.active_connections.get(client_id)
+        if connection is not None:
+            connection['last_activity'] = time.monotonic()
+
+    def _last_activity(self, connection: dict) -> float:
+        # a paused console keeps sending packets even when GT7_IDLE_OUTPUT_INTERVAL=0 suppresses them
+        last_packet = self.last_packet_time(connection['ps_ip']) if self.last_packet_time else None
+        if last_packet is not None:
+            return max(connection['last_activity'], last_packet)
+        return connection['last_activity']
+
+    async def evict_idle(self, interval: float = 5.0):
+        """Periodically disconnect connections that haven't received telemetry within idle_timeout"""
+        while True:
+            await asyncio.sleep(interval)
+            if not self.idle_timeout:
+                continue
+            now = time.monotonic()
+            for client_id, connection in list(self.active_connections.items()):
+                if connection['ps_ip'] is not None and now - self._last_activity(connection) > self.idle_timeout:
+                    self.evicted["idle"] += 1
+                    logger.info(f"Evicting idle client: {client_id}")
+                    await self.disconnect(client_id)
+
+    def stats(self) -> dict:
+        return {
+            "active": len(self.active_connections),
+            "rejected": dict(self.rejected),
+            "evicted": dict(self.evicted),
+        }
@@ -0,0 +1,185 @@
+# Derived Channel Computation
+import math
+from typing import List, Optional
+
+from .models import TelemetryPacket, DerivedChannels
+
+
+class DerivedChannelEngine:
+    """
+        Computes derived channels (g-forces, wheel slip, shift points) incrementally from
+        consecutive packets. All per-stream state lives in fixed size buffers allocated up
+        front, so the per-packet cost stays constant for the whole session.
+    """
+    GRAVITY = 9.80665
+    PACKET_RATE = 60.0  # GT7 sends one packet per frame
+    G_SMOOTHING = 0.3  # EWMA factor applied to the raw velocity-delta accelerations
+    RESYNC_GAP = 300  # packets, a bigger jump back means GT7 restarted its packet counter
+
+    # wheel slip calibration
+    CALIBRATION_SMOOTHING = 0.02
+    MIN_CALIBRATION_SPEED = 10.0  # m/s
+
+    # shift point learning, acceleration is tracked per gear per RPM bin
+    MAX_GEARS = 8
+    RPM_BIN_SIZE = 250
+    RPM_BINS = 80  # up to 20,000 rpm
+    ACCEL_SMOOTHING = 0.2
+    FULL_THROTTLE = 250
+    SHIFT_POINT_REFRESH = 60  # packets between shift point recalculations
+
+    def __init__(self):
+        self._car_id: Optional[int] = None
+        self._previous_id: Optional[int] = None
+        self._previous_velocity = (0.0, 0.0, 0.0)
+        self._g_longitudinal = 0.0
+        self._g_lateral = 0.0
+
+        # speed_mps * gear_ratio / rpm while the tyres are gripping
+        self._drivetrain_constant: Optional[float] = None
+
+        # preallocated per gear acceleration curves and shift points
+        self._accel: List[List[float]] = [[math.nan] * self.RPM_BINS for _ in range(self.MAX_GEARS)]
+        self._shift_points: List[Optional[float]] = [None] * self.MAX_GEARS
+        self._packets_since_refresh = 0
+
+    def reset(self):
+        """Clear all learned state, e.g. when the car changes."""
+        self.__init__()
+
+    def update(self, packet: TelemetryPacket) -> DerivedChannels:
+        """Feed the next packet and return its derived channels."""
+        if packet.car_id != self._car_id:
+            self.reset()
+            self._car_id = packet.car_id
+
+        self._update_g_forces(packet)
+        wheel_slip = self._update_wheel_slip(packet)
+        upshift_rpm = self._update_shift_points(packet)
+
+        return DerivedChannels(
+            g_longitudinal=self._g_longitudinal,
+            g_lateral=self._g_lateral,
+            wheel_slip=wheel_slip,
+            upshift_rpm=upshift_rpm,
+            shift_now=(
+                upshift_rpm is not None and
+                0 < packet.current_gear < self._top_gear(packet) and
+                packet.engine_rpm >= upshift_rpm
+            )
+        )
+
+    def _update_g_forces(self, packet: TelemetryPacket):
+        """Longitudinal and lateral G from the change in world velocity, projected onto the heading."""
+        velocity = (packet.velocity.x, packet.velocity.y, packet.velocity.z)
+        previous_id, previous_velocity = self._previous_id, self._previous_velocity
+
+        # out of order or repeated packets carry no new information
+        if previous_id is not None and packet.packet_id <= previous_id:
+            if previous_id - packet.packet_id <= self.RESYNC_GAP:
+                return
+            previous_id = None  # counter restarted, start a new velocity sequence
+        self._previous_id = packet.packet_id
+        self._previous_velocity = velocity
+        if previous_id is None:
+            return
+
+        dt = (packet.packet_id - previous_id) / self.PACKET_RATE
+        ax, _, az = ((v - p) / dt for v, p in zip(velocity, previous_velocity))
+
+        # heading from the horizontal velocity, nothing meaningful when stationary
+        speed = math.hypot(velocity[0], velocity[2])
+        if speed < 0.5:
+            longitudinal = lateral = 0.0
+        else:
+            fx, fz = velocity[0] / speed, velocity[2] / speed
+            longitudinal = (ax * fx + az * fz) / self.GRAVITY
+            lateral = (fz * ax - fx * az) / self.GRAVITY
+
+        alpha = self.G_SMOOTHING
+        self._g_longitudinal += alpha * (longitudinal - self._g_longitudinal)
+        self._g_lateral += alpha * (lateral - self._g_lateral)
+
+    def _gear_ratio(self, packet: TelemetryPacket) -> Optional[float]:
+        gear = packet.current_gear
+        if 0 < gear <= len(packet.gear_ratios) and packet.gear_ratios[gear - 1] > 0:
+            return packet.gear_ratios[gear - 1]
+        return None
+
+    @staticmethod
+    def _top_gear(packet: TelemetryPacket) -> int:
+        return sum(1 for ratio in packet.gear_ratios if ratio > 0)
+
+    def _update_wheel_slip(self, packet: TelemetryPacket) -> Optional[float]:
+        """
+            Estimated driven wheel slip ratio: road speed implied by RPM x gear ratio vs the
+            actual speed. The packet carries no final drive or tyre radius, so the drivetrain
+            constant is learned while cruising with the clutch engaged and little throttle.
+        """
+        ratio = self._gear_ratio(packet)
+        if ratio is None or packet.engine_rpm <= 0 or packet.clutch > 0.1:
+            return None
+
+        constant = packet.speed_mps * ratio / packet.engine_rpm
+        cruising = (
+            packet.speed_mps > self.MIN_CALIBRATION_SPEED and
+            packet.throttle < 128 and packet.brake == 0
+        )
+        if cruising:
+            if self._drivetrain_constant is None:
+                self._drivetrain_constant = constant
+            else:
+                self._drivetrain_constant += self.CALIBRATION_SMOOTHING * (constant - self._drivetrain_constant)
+
+        if self._drivetrain_constant is None or packet.speed_mps < 1.0:
+            return None
+        wheel_speed = packet.engine_rpm / ratio * self._drivetrain_constant
+        return wheel_speed / packet.speed_mps - 1.0
+
+    def _update_shift_points(self, packet: TelemetryPacket) -> Optional[float]:
+        """
+            Learn acceleration vs RPM per gear at full throttle and return the upshift RPM for
+            the current gear: the point where the next gear would accelerate harder at the
+            RPM it lands on. Falls back to the game's rev indicator until enough is learned.
+        """
+        gear = packet.current_gear
+        if not 0 < gear <= self.MAX_GEARS:
+            return None
+
+        rpm_bin = int(packet.engine_rpm // self.RPM_BIN_SIZE)
+        if packet.throttle >= self.FULL_THROTTLE and packet.clutch <= 0.1 and 0 <= rpm_bin < self.RPM_BINS:
+            curve = self._accel[gear - 1]
+            accel = self._g_longitudinal
+            curve[rpm_bin] = accel if math.isnan(curve[rpm_bin]) else (
+                curve[rpm_bin] + self.ACCEL_SMOOTHING * (accel - curve[rpm_bin])
+            )
+
+        self._packets_since_refresh += 1
+        if self._packets_since_refresh >= self.SHIFT_POINT_REFRESH:
+            self._packets_since_refresh = 0
+            self._refresh_shift_points(packet)
+
+        fallback = packet.rpm_flashing if packet.rpm_flashing > 0 else None
+        return self._shift_points[gear - 1] or fallback
+
+    def _refresh_shift_points(self, packet: TelemetryPacket):
+        """Find the acceleration crossover between each pair of adjacent gears."""
+        limit = packet.rpm_hit if packet.rpm_hit > 0 else self.RPM_BINS * self.RPM_BIN_SIZE
+        for gear in range(1, min(self._top_gear(packet), self.MAX_GEARS)):
+            ratio, next_ratio = packet.gear_ratios[gear - 1], packet.gear_ratios[gear]
+            current, following = self._accel[gear - 1], self._accel[gear]
+            shift_point = None
+
+            for rpm_bin in range(self.RPM_BINS):
+                rpm = (rpm_bin + 0.5) * self.RPM_BIN_SIZE
+                if rpm > limit:
+                    break
+                landing_bin = int(rpm * next_ratio / ratio // self.RPM_BIN_SIZE)
+                here, there = current[rpm_bin], following[landing_bin]
+                if math.isnan(here) or math.isnan(there):
+                    continue
+                if there > here:
+                    shift_point = rpm
+                    break
+
+            self._shift_points[gear - 1] = shift_point
@@ -0,0 +1,191 @@
+# Session Export (CSV / Parquet)
+import argparse
+import csv
+import struct
+import typing
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from loguru import logger
+from pydantic import BaseModel
+
+from .parser import TelemetryParser
+from .models import TelemetryPacket
+from .recorder import read_session
+
+FORMATS = ("csv", "parquet")
+GEAR_COUNT = 8  # the parser always reads 8 gear ratios
+CURRENT_LAP = struct.Struct('<h')
+CURRENT_LAP_OFFSET = 0x74
+
+
+def _unwrap_optional(annotation):
+    args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+    return args[0] if typing.get_origin(annotation) is Union and len(args) == 1 else annotation
+
+
+def packet_columns() -> Dict[str, type]:
+    """Flattened export columns and their python types, in packet field order."""
+    columns: Dict[str, type] = {"timestamp": float}
+    for name, field in TelemetryPacket.model_fields.items():
+        annotation = _unwrap_optional(field.annotation)
+        if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+            for key, nested in annotation.model_fields.items():
+                columns[f"{name}_{key}"] = _unwrap_optional(nested.annotation)
+        elif name == "gear_ratios":
+            for index in range(1, GEAR_COUNT + 1):
+                columns[f"gear_ratio_{index}"] = float
+        else:
+            columns[name] = annotation
+    return columns
+
+
+def flatten_packet(packet: TelemetryPacket, timestamp: Optional[float] = None) -> Dict[str, Any]:
+    """Flatten a packet into a single row: position.x -> position_x, gear_ratios[0] -> gear_ratio_1."""
+    row: Dict[str, Any] = {"timestamp": timestamp}
+    for name, value in packet.model_dump().items():
+        if isinstance(value, dict):
+            for key, nested in value.items():
+                row[f"{name}_{key}"] = nested
+        elif name == "gear_ratios":
+            for index, ratio in enumerate(value[:GEAR_COUNT], start=1):
+                row[f"gear_ratio_{index}"] = ratio
+        elif value is not None:
+            row[name] = value
+    return row
+
+
+def iter_session_rows(path: Union[str, Path], fields: Optional[Sequence[str]] = None,
+                      laps: Optional[Tuple[int, int]] = None) -> Iterator[Dict[str, Any]]:
+    """
+        Stream a recorded session through the parser, yielding one flattened row per packet.
+        Every row has the same columns, nested values that are missing (e.g. car_info for an
+        unknown car) are left empty. With a lap range, datagrams outside it are skipped by
+        their raw lap counter before they are parsed.
+    """
+    columns = list(fields) if fields else list(packet_columns())
+    parser = TelemetryParser()
+    for timestamp, data in read_session(path):
+        if laps and len(data) >= CURRENT_LAP_OFFSET + CURRENT_LAP.size:
+            current_lap = CURRENT_LAP.unpack_from(data, CURRENT_LAP_OFFSET)[0]
+            if not laps[0] <= current_lap <= laps[1]:
+                continue
+
+        try:
+            packet = parser.parse(data)
+        except Exception:
+            continue  # already logged by the parser
+
+        row = flatten_packet(packet, timestamp)
+        yield {column: row.get(column) for column in columns}
+
+
+def _batches(rows: Iterator[Dict[str, Any]], batch_size: int) -> Iterator[List[Dict[str, Any]]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _write_csv(batches: Iterator[List[Dict[str, Any]]], output: Path, columns: List[str]) -> int:
+    written = 0
+    with open(output, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        for batch in batches:
+            writer.writerows(batch)
+            written += len(batch)
+    return written
+
+
+def _write_parquet(batches: Iterator[List[Dict[str, Any]]], output: Path, columns: List[str]) -> int:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet export requires pyarrow, install it with 'pip install pyarrow'")
+
+    arrow_types = {float: pa.float64(), int: pa.int64(), bool: pa.bool_(), str: pa.string()}
+    types = packet_columns()
+    schema = pa.schema([(column, arrow_types.get(types[column], pa.string())) for column in columns])
+
+    written = 0
+    with pq.ParquetWriter(output, schema) as writer:
+        for batch in batches:
+            # every batch becomes its own row group
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            written += len(batch)
+    return written
+
+
+def export_session(path: Union[str, Path], output: Union[str, Path], fmt: Optional[str] = None,
+                   fields: Optional[Sequence[str]] = None, laps: Optional[Tuple[int, int]] = None,
+                   batch_size: int = 10_000) -> int:
+    """
+        Export a recorded session to CSV or Parquet in batches of `batch_size` rows, so memory
+        stays bounded however long the session is. Returns the number of rows written.
+    """
+    output = Path(output)
+    fmt = (fmt or output.suffix.lstrip(".")).lower()
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    if batch_size <= 0:
+        raise ValueError("Batch size must be positive")
+
+    columns = list(packet_columns())
+    if fields:
+        unknown = [field for field in fields if field not in columns]
+        if unknown:
+            raise ValueError(f"Unknown export fields: {', '.join(unknown)}")
+        columns = list(fields)
+
+    batches = _batches(iter_session_rows(path, fields=columns, laps=laps), batch_size)
+    writer = _write_csv if fmt == "csv" else _write_parquet
+    written = writer(batches, output, columns)
+
+    logger.info(f"Exported {written} rows from {path} to {output}")
+    return written
+
+
+def parse_lap_range(value: str) -> Tuple[int, int]:
+    """Parse '3' or '2-5' into an inclusive lap range."""
+    try:
+        start, _, end = value.partition("-")
+        start = int(start)
+        end = int(end) if end else start
+    except ValueError:
+        raise ValueError(f"Invalid lap range: {value}")
+    if start > end:
+        raise ValueError(f"Invalid lap range: {value}")
+    return start, end
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    arg_parser = argparse.ArgumentParser(description="Export a recorded GT7 session to CSV or Parquet")
+    arg_parser.add_argument("session", help="recorded session file (.gt7)")
+    arg_parser.add_argument("output", help="output file (.csv or .parquet)")
+    arg_parser.add_argument("--format", choices=FORMATS, help="output format, defaults to the output extension")
+    arg_parser.add_argument("--fields", help="comma separated columns to export, e.g. timestamp,speed_mps,position_x")
+    arg_parser.add_argument("--laps", help="lap or inclusive lap range to export, e.g. 3 or 2-5")
+    arg_parser.add_argument("--batch-size", type=int, default=10_000, help="rows per batch / parquet row group")
+    args = arg_parser.parse_args(argv)
+
+    try:
+        export_session(
+            args.session,
+            args.output,
+            fmt=args.format,
+            fields=args.fields.split(",") if args.fields else None,
+            laps=parse_lap_range(args.laps) if args.laps else None,
+            batch_size=args.batch_size
+        )
+    except (ValueError, RuntimeError) as e:
+        arg_parser.error(str(e))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+# Reorder / Jitter Buffer
+import asyncio
+import heapq
+import time
+from contextlib import aclosing
+from typing import AsyncGenerator, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from .models import TelemetryPacket, Vector3
+
+
+# continuous fields that can be linearly interpolated between two packets,
+# everything else (gear, flags, laps, pedals...) is taken from the nearest packet
+VECTOR_FIELDS = ("position", "velocity", "rotation", "angular_velocity")
+SCALAR_FIELDS = (
+    "rel_orientation_to_north", "body_height", "engine_rpm", "gas_level", "speed_mps",
+    "turbo_boost", "oil_pressure", "water_temp", "oil_temp",
+    "tire_temp_fl", "tire_temp_fr", "tire_temp_rl", "tire_temp_rr",
+    "clutch", "clutch_engagement", "rpm_after_clutch",
+    "current_fuel", "fuel_percentage", "fuel_consumption_lap",
+)
+
+
+def _lerp(a: float, b: float, t: float) -> float:
+    return a + (b - a) * t
+
+
+def interpolate_packets(a: TelemetryPacket, b: TelemetryPacket, t: float) -> TelemetryPacket:
+    """Linearly interpolate continuous fields between two packets (0 <= t <= 1)."""
+    nearest = a if t < 0.5 else b
+    update = {}
+    for name in VECTOR_FIELDS:
+        va, vb = getattr(a, name), getattr(b, name)
+        update[name] = Vector3(x=_lerp(va.x, vb.x, t), y=_lerp(va.y, vb.y, t), z=_lerp(va.z, vb.z, t))
+    for name in SCALAR_FIELDS:
+        update[name] = _lerp(getattr(a, name), getattr(b, name), t)
+    return nearest.model_copy(update=update)
+
+
+class JitterBuffer:
+    """
+        Small playout buffer keyed on packet_id.
+
+        GT7 sends one packet per frame (~60 Hz) with an increasing packet_id, so the id
+        doubles as a frame clock. Packets are held for at most `latency` seconds to let
+        late datagrams fill in, then released in packet_id order. Anything that arrives
+        after a newer packet has already been released is dropped as stale, unless the id
+        jumped back by more than RESYNC_GAP, which means GT7 restarted its counter.
+    """
+    RESYNC_GAP = 300  # packets, ~5 seconds
+
+    def __init__(self, latency: float = 0.05, max_packets: int = 64, packet_rate: float = 60.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.latency = latency
+        self.max_packets = max_packets
+        self.packet_rate = packet_rate
+        self.clock = clock
+
+        self._heap: List[Tuple[int, float, TelemetryPacket]] = []
+        self._ids = set()
+        self._last_released: Optional[int] = None
+        self._newest: Optional[int] = None
+
+        # paced output state
+        self._anchor: Optional[Tuple[int, float]] = None  # (packet_id, monotonic time)
+        self._previous: Optional[Tuple[int, TelemetryPacket]] = None
+        self._previous_at: Optional[float] = None  # when the newest released packet was popped
+
+        self.received = 0
+        self.resyncs = 0
+        self.released = 0
+        self.reordered = 0
+        self.dropped_stale = 0
+        self.dropped_duplicate = 0
+        self.dropped_overflow = 0
+        self._total_delay = 0.0
+        self._max_delay = 0.0
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def push(self, packet: TelemetryPacket, now: Optional[float] = None) -> bool:
+        """Add a packet to the buffer. Returns False if it was dropped."""
+        now = self.clock() if now is None else now
+        packet_id = packet.packet_id
+        self.received += 1
+
+        # _newest is never behind _last_released
+        if self._newest is not None and packet_id < self._newest - self.RESYNC_GAP:
+            self._resync()
+
+        if self._last_released is not None and packet_id <= self._last_released:
+            self.dropped_stale += 1
+            return False
+        if packet_id in self._ids:
+            self.dropped_duplicate += 1
+            return False
+
+        if self._newest is not None and packet_id < self._newest:
+            self.reordered += 1
+        if self._newest is None or packet_id > self._newest:
+            self._newest = packet_id
+
+        heapq.heappush(self._heap, (packet_id, now, packet))
+        self._ids.add(packet_id)
+
+        # never grow past max_packets, force out the oldest instead
+        while len(self._heap) > self.max_packets:
+            self._pop(now)
+            self.dropped_overflow += 1
+        return True
+
+    def _resync(self):
+        """Forget everything keyed on the old packet_id sequence."""
+        self._heap.clear()
+        self._ids.clear()
+        self._last_released = None
+        self._newest = None
+        self._anchor = None
+        self._previous = None
+        self._previous_at = None
+        self.resyncs += 1
+
+    def _pop(self, now: float) -> TelemetryPacket:
+        packet_id, arrived, packet = heapq.heappop(self._heap)
+        self._ids.discard(packet_id)
+        self._last_released = packet_id
+
+        delay = now - arrived
+        self._total_delay += delay
+        self._max_delay = max(self._max_delay, delay)
+        self.released += 1
+        return packet
+
+    def pop_ready(self, now: Optional[float] = None) -> List[TelemetryPacket]:
+        """
+            Release packets in packet_id order. The head is released straight away when it
+            is the next expected id, otherwise once it has waited out the latency budget.
+        """
+        now = self.clock() if now is None else now
+        ready = []
+        while self._heap:
+            packet_id, arrived, _ = self._heap[0]
+            in_sequence = self._last_released is not None and packet_id == self._last_released + 1
+            if not in_sequence and now - arrived < self.latency:
+                break
+            ready.append(self._pop(now))
+        return ready
+
+    def next_release_delay(self, now: Optional[float] = None) -> Optional[float]:
+        """Seconds until pop_ready() would release the head packet, None when empty."""
+        if not self._heap:
+            return None
+        now = self.clock() if now is None else now
+        packet_id, arrived, _ = self._heap[0]
+        if self._last_released is not None and packet_id == self._last_released + 1:
+            return 0.0
+        return max(self.latency - (now - arrived), 0.0)
+
+    def flush(self) -> List[TelemetryPacket]:
+        """Release everything still held, in order."""
+        now = self.clock()
+        return [self._pop(now) for _ in range(len(self._heap))]
+
+    def sample(self, now: Optional[float] = None) -> Optional[TelemetryPacket]:
+        """
+            Paced output: return the packet state `latency` seconds behind the live edge,
+            interpolating between the two packets around that point in time. Once the source
+            goes quiet the last packet is held for at most `latency`, then None is returned
+            so a paused or silent console doesn't produce a stream of duplicates.
+        """
+        now = self.clock() if now is None else now
+        if self._anchor is None:
+            if not self._heap:
+                return None
+            self._anchor = (self._heap[0][0], now)
+
+        anchor_id, anchor_time = self._anchor
+        playout = anchor_id + (now - anchor_time - self.latency) * self.packet_rate
+
+        # resync the playout clock if it has drifted away from what we're receiving
+        if self._newest is not None and (playout > self._newest + 1 or
+                                         playout < self._newest - self.max_packets):
+            self._anchor = (self._newest, now - self.latency)
+            playout = float(self._newest)
+
+        # consume every packet at or before the playout point
+        while self._heap and self._heap[0][0] <= playout:
+            packet = self._pop(now)
+            self._previous = (packet.packet_id, packet)
+            self._previous_at = now
+
+        if self._previous is None:
+            return None
+
+        previous_id, previous = self._previous
+        if not self._heap:
+            return previous if now - self._previous_at <= self.latency else None
+
+        next_id, _, upcoming = self._heap[0]
+        fraction = (playout - previous_id) / (next_id - previous_id)
+        return interpolate_packets(previous, upcoming, min(max(fraction, 0.0), 1.0))
+
+    def stats(self) -> Dict[str, float]:
+        """Counters and added latency, for metrics and benchmarks."""
+        return {
+            "received": self.received,
+            "resyncs": self.resyncs,
+            "released": self.released,
+            "buffered": len(self._heap),
+            "reordered": self.reordered,
+            "dropped_stale": self.dropped_stale,
+            "dropped_duplicate": self.dropped_duplicate,
+            "dropped_overflow": self.dropped_overflow,
+            "avg_delay_ms": (self._total_delay / self.released * 1000) if self.released else 0.0,
+            "max_delay_ms": self._max_delay * 1000,
+        }
+
+
+async def jitter_stream(source: AsyncIterator[TelemetryPacket], buffer: JitterBuffer,
+                        output_rate: Optional[float] = None) -> AsyncGenerator[TelemetryPacket, None]:
+    """
+        Run a packet stream through a JitterBuffer.
+
+        Without an output rate packets are just reordered and released as they become
+        ready. With an output rate the buffer is sampled on a fixed clock and continuous
+        fields are interpolated between packets.
+    """
+    if not output_rate:
+        async with aclosing(_reorder(source, buffer)) as packets:
+            async for packet in packets:
+                yield packet
+        return
+
+    async def fill():
+        async with aclosing(source):
+            async for packet in source:
+                buffer.push(packet)
+
+    producer = asyncio.create_task(fill())
+    interval = 1.0 / output_rate
+    next_tick = buffer.clock()
+    try:
+        while not producer.done() or len(buffer):
+            packet = buffer.sample()
+            if packet is not None:
+                yield packet
+            next_tick += interval
+            await asyncio.sleep(max(next_tick - buffer.clock(), 0))
+        # surface errors from the source
+        producer.result()
+    finally:
+        producer.cancel()
+        await asyncio.wait({producer})
+
+
+async def _reorder(source: AsyncIterator[TelemetryPacket],
+                   buffer: JitterBuffer) -> AsyncGenerator[TelemetryPacket, None]:
+    """
+        Reorder-only mode. Waiting for the next packet times out when the head of the buffer
+        is due, so a packet behind a gap is released after `latency` even if nothing else
+        arrives (stalls, rate limited idle packets).
+    """
+    source = source.__aiter__()
+    pending: Optional[asyncio.Future] = None
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(source.__anext__())
+            done, _ = await asyncio.wait({pending}, timeout=buffer.next_release_delay())
+            if done:
+                try:
+                    packet = pending.result()
+                except StopAsyncIteration:
+                    break
+                finally:
+                    pending = None
+                buffer.push(packet)
+            for ready in buffer.pop_ready():
+                yield ready
+        for ready in buffer.flush():
+            yield ready
+    finally:
+        # stop the read in progress before closing the source
+        if pending is not None:
+            pending.cancel()
+            await asyncio.wait({pending})
+        if hasattr(source, "aclose"):
+            await source.aclose()
@@ -0,0 +1,146 @@
+# Lap Comparison
+import struct
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Union
+
+import numpy as np
+
+from .models import SimulatorFlags
+from .recorder import read_session
+
+PACKET_SIZE = 0x128
+PACKET_RATE = 60.0  # GT7 sends one packet per frame
+CURRENT_LAP = struct.Struct('<h')
+CURRENT_LAP_OFFSET = 0x74
+PACKET_ID = struct.Struct('<i')
+PACKET_ID_OFFSET = 0x70
+FLAGS = struct.Struct('<H')
+FLAGS_OFFSET = 0x8E
+RUN_GAP = 300  # packets, a bigger jump in packet_id means GT7 restarted or the recording resumed later
+MAX_TIME_STEP = 30  # packets, longer gaps between kept packets are pauses and don't count as lap time
+
+# the few channels a comparison needs, read straight from the decrypted datagrams
+LAP_DTYPE = np.dtype({
+    'names': ['position', 'speed_mps', 'packet_id', 'gear', 'throttle', 'brake'],
+    'formats': [('<f4', 3), '<f4', '<i4', 'u1', 'u1', 'u1'],
+    'offsets': [0x04, 0x4C, 0x70, 0x90, 0x91, 0x92],
+    'itemsize': PACKET_SIZE,
+})
+
+TRACES = ('speed_mps', 'throttle', 'brake', 'gear', 'time')
+MAX_GRID_POINTS = 200_000  # a 20 km lap at 0.1 m
+
+
+def read_lap(path: Union[str, Path], lap: int, occurrence: int = -1) -> np.ndarray:
+    """
+        Raw channels of every packet recorded during `lap`, ordered by packet id, without
+        paused packets. A recording can hold several runs (restarts, more than one race), each
+        with its own `lap`; they are split where the lap counter goes backwards or packet_id
+        jumps, and `occurrence` picks one of them (default the last).
+    """
+    occurrences: List[List[bytes]] = [[]]
+    last_id = last_lap = None
+    for _, data in read_session(path):
+        if len(data) < PACKET_SIZE:
+            continue
+        packet_id = PACKET_ID.unpack_from(data, PACKET_ID_OFFSET)[0]
+        current_lap = CURRENT_LAP.unpack_from(data, CURRENT_LAP_OFFSET)[0]
+        if last_id is not None:
+            restarted = current_lap < last_lap and packet_id > last_id
+            if (restarted or abs(packet_id - last_id) > RUN_GAP) and occurrences[-1]:
+                occurrences.append([])
+        if last_id is None or packet_id > last_id or abs(packet_id - last_id) > RUN_GAP:
+            last_id, last_lap = packet_id, current_lap
+
+        if current_lap == lap and not FLAGS.unpack_from(data, FLAGS_OFFSET)[0] & SimulatorFlags.PAUSED:
+            occurrences[-1].append(data[:PACKET_SIZE])
+
+    occurrences = [payloads for payloads in occurrences if len(payloads) >= 2]
+    if not occurrences:
+        raise LookupError(f"Lap {lap} not found in {Path(path).name}")
+    try:
+        payloads = occurrences[occurrence]
+    except IndexError:
+        raise LookupError(f"Lap {lap} was recorded {len(occurrences)} time(s) in {Path(path).name}") from None
+
+    records = np.frombuffer(b''.join(payloads), dtype=LAP_DTYPE)
+    # recordings can hold repeated or out of order datagrams
+    _, unique = np.unique(records['packet_id'], return_index=True)
+    return records[unique]
+
+
+def lap_distance(records: np.ndarray) -> np.ndarray:
+    """
+        Distance travelled along the lap from position deltas. Steps the velocity can't explain
+        (a reset or teleport to the pits) fall back to speed x time.
+    """
+    dt = np.diff(records['packet_id']) / PACKET_RATE
+    steps = np.linalg.norm(np.diff(records['position'].astype(np.float64), axis=0), axis=1)
+    integrated = records['speed_mps'][1:] * dt
+    steps = np.where(steps > integrated * 2 + 1.0, integrated, steps)
+    return np.concatenate(([0.0], np.cumsum(steps)))
+
+
+@lru_cache(maxsize=16)
+def _load_lap(path: str, mtime: float, lap: int, occurrence: int) -> Dict[str, np.ndarray]:
+    records = read_lap(path, lap, occurrence)
+    steps = np.diff(records['packet_id'])
+    steps = np.where(steps > MAX_TIME_STEP, 1, steps)
+    return {
+        'distance': lap_distance(records),
+        'time': np.concatenate(([0], np.cumsum(steps))) / PACKET_RATE,
+        'speed_mps': records['speed_mps'].astype(np.float64),
+        'throttle': records['throttle'].astype(np.float64),
+        'brake': records['brake'].astype(np.float64),
+        'gear': (records['gear'] & 0b00001111).astype(np.int64),
+    }
+
+
+def load_lap(path: Union[str, Path], lap: int, occurrence: int = -1) -> Dict[str, np.ndarray]:
+    """Lap channels with distance, cached so an overlay view can re-query cheaply."""
+    path = Path(path)
+    return _load_lap(str(path), path.stat().st_mtime, lap, occurrence)
+
+
+def resample(lap: Dict[str, np.ndarray], grid: np.ndarray, scale: float = 1.0) -> Dict[str, np.ndarray]:
+    """Interpolate a lap onto a distance grid, gears are held rather than interpolated."""
+    distance = lap['distance'] * scale
+    gear_index = np.clip(np.searchsorted(distance, grid, side='right') - 1, 0, len(distance) - 1)
+    result = {name: np.interp(grid, distance, lap[name]) for name in TRACES if name != 'gear'}
+    result['gear'] = lap['gear'][gear_index]
+    return result
+
+
+def compare_laps(path: Union[str, Path], lap: int, reference_path: Union[str, Path], reference_lap: int,
+                 resolution: float = 1.0, occurrence: int = -1, reference_occurrence: int = -1) -> Dict[str, Any]:
+    """
+        Align a lap with a reference lap on a common distance grid. The lap is scaled to the
+        reference lap's length so start and finish line up despite different racing lines.
+        time_delta is positive where the lap is behind the reference. The occurrences pick
+        which run's lap to use when a recording holds the same lap number more than once.
+    """
+    if resolution <= 0:
+        raise ValueError("Resolution must be positive")
+    target = load_lap(path, lap, occurrence)
+    reference = load_lap(reference_path, reference_lap, reference_occurrence)
+
+    length, target_length = reference['distance'][-1], target['distance'][-1]
+    if length <= 0 or target_length <= 0:
+        raise ValueError("Lap has no distance travelled")
+
+    if length / resolution > MAX_GRID_POINTS:
+        raise ValueError(f"Resolution too fine for a {length:.0f} m lap, at most {MAX_GRID_POINTS} points")
+    grid = np.arange(0.0, length, resolution)
+    aligned_reference = resample(reference, grid)
+    aligned = resample(target, grid, scale=length / target_length)
+
+    return {
+        'distance': grid.tolist(),
+        'length_m': float(length),
+        'lap_time_s': float(target['time'][-1]),
+        'reference_lap_time_s': float(reference['time'][-1]),
+        'lap': {name: values.tolist() for name, values in aligned.items()},
+        'reference': {name: values.tolist() for name, values in aligned_reference.items()},
+        'time_delta': (aligned['time'] - aligned_reference['time']).tolist(),
+    }
@@ -0,0 +1,270 @@
+# Persistent Lap and Session Store
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import aclosing
+from pathlib import Path
+from typing import AsyncGenerator, AsyncIterator, List, Optional, Tuple, Union
+
+from loguru import logger
+
+from .models import TelemetryPacket
+from .log_limiter import rate_limited_logger
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    ps_ip TEXT NOT NULL,
+    car_id INTEGER NOT NULL,
+    started_at REAL NOT NULL,
+    ended_at REAL
+);
+CREATE TABLE IF NOT EXISTS laps (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL REFERENCES sessions(id),
+    car_id INTEGER NOT NULL,
+    lap_number INTEGER NOT NULL,
+    lap_time_ms INTEGER NOT NULL,
+    fuel_used REAL NOT NULL,
+    max_speed_mps REAL NOT NULL,
+    recorded_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_laps_car_time ON laps (car_id, lap_time_ms);
+CREATE INDEX IF NOT EXISTS idx_laps_session ON laps (session_id, lap_number);
+CREATE INDEX IF NOT EXISTS idx_sessions_ip_started ON sessions (ps_ip, started_at);
+CREATE INDEX IF NOT EXISTS idx_sessions_started ON sessions (started_at);
+"""
+
+
+class LapStore:
+    """
+        SQLite store of sessions and completed laps. Writes from the live pipeline are queued
+        and committed in batches by a background thread, so recording never blocks ingest.
+        Reads open their own connection and can run from any thread or process. The database
+        file and schema are created on first use, not when the store is constructed.
+    """
+
+    def __init__(self, path: Union[str, Path], batch_size: int = 100, flush_interval: float = 1.0):
+        self.path = str(path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+        self.rows_written = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=10)
+        connection.row_factory = sqlite3.Row
+        connection.execute("PRAGMA journal_mode=WAL")  # readers in other workers don't block the writer
+        if not self._schema_ready:
+            with self._schema_lock:
+                if not self._schema_ready:
+                    connection.executescript(SCHEMA)
+                    self._schema_ready = True
+        return connection
+
+    # writes
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._write_loop, name="lap-store", daemon=True)
+            self._thread.start()
+
+    def close(self):
+        """Flush pending writes and stop the writer thread."""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def stats(self) -> dict:
+        return {"rows_written": self.rows_written, "pending": self._queue.qsize()}
+
+    def _enqueue(self, sql: str, params: tuple):
+        self.start()
+        self._queue.put((sql, params))
+
+    def start_session(self, ps_ip: str, car_id: int, started_at: Optional[float] = None) -> str:
+        session_id = uuid.uuid4().hex
+        self._enqueue(
+            "INSERT INTO sessions (id, ps_ip, car_id, started_at) VALUES (?, ?, ?, ?)",
+            (session_id, ps_ip, car_id, started_at or time.time())
+        )
+        return session_id
+
+    def end_session(self, session_id: str, ended_at: Optional[float] = None):
+        self._enqueue("UPDATE sessions SET ended_at = ? WHERE id = ?", (ended_at or time.time(), session_id))
+
+    def add_lap(self, session_id: str, car_id: int, lap_number: int, lap_time_ms: int,
+                fuel_used: float, max_speed_mps: float, recorded_at: Optional[float] = None):
+        self._enqueue(
+            "INSERT INTO laps (session_id, car_id, lap_number, lap_time_ms, fuel_used, max_speed_mps, recorded_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (session_id, car_id, lap_number, lap_time_ms, fuel_used, max_speed_mps, recorded_at or time.time())
+        )
+
+    def _write_loop(self):
+        connection = self._connect()
+        running = True
+        try:
+            while running:
+                batch: List[Tuple[str, tuple]] = []
+                try:
+                    item = self._queue.get(timeout=self.flush_interval)
+                    while item is not None:
+                        batch.append(item)
+                        if len(batch) >= self.batch_size:
+                            break
+                        item = self._queue.get_nowait()
+                    running = item is not None
+                except queue.Empty:
+                    pass
+
+                if batch:
+                    try:
+                        with connection:
+                            for sql, params in batch:
+                                connection.execute(sql, params)
+                        self.rows_written += len(batch)
+                    except sqlite3.Error as e:
+                        rate_limited_logger.error("lap_store", "Error writing {} rows to lap store: {}", len(batch), e)
+        finally:
+            connection.close()
+
+    # queries
+
+    def _query(self, sql: str, params: tuple) -> List[dict]:
+        connection = self._connect()
+        try:
+            return [dict(row) for row in connection.execute(sql, params)]
+        finally:
+            connection.close()
+
+    def best_laps(self, car_id: Optional[int] = None, limit: int = 10) -> List[dict]:
+        """Fastest laps, optionally for one car (uses idx_laps_car_time)."""
+        sql = ("SELECT laps.*, sessions.ps_ip, sessions.started_at AS session_started_at "
+               "FROM laps JOIN sessions ON sessions.id = laps.session_id ")
+        params: tuple = ()
+        if car_id is not None:
+            sql += "WHERE laps.car_id = ? "
+            params = (car_id,)
+        sql += "ORDER BY laps.lap_time_ms LIMIT ?"
+        return self._query(sql, params + (limit,))
+
+    def recent_sessions(self, limit: int = 5, ps_ip: Optional[str] = None,
+                        car_id: Optional[int] = None) -> List[dict]:
+        """Last N sessions with per-session lap aggregates, for comparing recent runs."""
+        conditions, params = [], []
+        if ps_ip is not None:
+            conditions.append("sessions.ps_ip = ?")
+            params.append(ps_ip)
+        if car_id is not None:
+            conditions.append("sessions.car_id = ?")
+            params.append(car_id)
+        where = f"WHERE {' AND '.join(conditions)} " if conditions else ""
+
+        sql = (
+            "SELECT sessions.*, COUNT(laps.id) AS lap_count, MIN(laps.lap_time_ms) AS best_lap_ms, "
+            "AVG(laps.lap_time_ms) AS avg_lap_ms, AVG(laps.fuel_used) AS avg_fuel_per_lap, "
+            "MAX(laps.max_speed_mps) AS max_speed_mps "
+            "FROM (SELECT * FROM sessions " + where + "ORDER BY started_at DESC LIMIT ?) AS sessions "
+            "LEFT JOIN laps ON laps.session_id = sessions.id "
+            "GROUP BY sessions.id ORDER BY sessions.started_at DESC"
+        )
+        return self._query(sql, (*params, limit))
+
+    def session_laps(self, session_id: str) -> List[dict]:
+        return self._query("SELECT * FROM laps WHERE session_id = ? ORDER BY lap_number", (session_id,))
+
+
+class LapTracker:
+    """
+        Turns a packet stream into session and lap records. A new session starts on the first
+        packet, when the car changes or when the lap counter goes backwards (restart). Packets
+        without a lap in progress (current_lap <= 0, e.g. before the start) are ignored, and the
+        lap a session joins mid-way is not recorded unless it was seen starting from the line.
+    """
+    LAP_TIME_WAIT = 60  # packets to wait for GT7 to update last_lap_time after crossing the line
+
+    def __init__(self, store: LapStore, ps_ip: str):
+        self.store = store
+        self.ps_ip = ps_ip
+        self.session_id: Optional[str] = None
+        self._car_id: Optional[int] = None
+        self._lap = 0
+        self._lap_start_fuel = 0.0
+        self._max_speed = 0.0
+        self._last_lap_time = 0
+        self._partial_lap: Optional[int] = None  # lap that was already under way when tracking started
+        self._at_start = False  # seen a pre-race packet, so the next lap starts from the line
+
+        # completed lap waiting for its lap time: (lap number, fuel used, max speed, packets left)
+        self._pending: Optional[Tuple[int, float, float, int]] = None
+
+    def update(self, packet: TelemetryPacket):
+        if packet.current_lap <= 0:
+            self._at_start = True
+            return
+
+        if self.session_id is None or packet.car_id != self._car_id or packet.current_lap < self._lap:
+            self._start_session(packet)
+
+        if packet.current_lap > self._lap:
+            self._pending = (self._lap, self._lap_start_fuel - packet.current_fuel, self._max_speed,
+                             self.LAP_TIME_WAIT)
+            self._lap = packet.current_lap
+            self._lap_start_fuel = packet.current_fuel
+            self._max_speed = 0.0
+
+        self._max_speed = max(self._max_speed, packet.speed_mps)
+        self._at_start = False
+
+        if self._pending:
+            self._finish_pending(packet)
+
+    def _finish_pending(self, packet: TelemetryPacket):
+        lap_number, fuel_used, max_speed, packets_left = self._pending
+        updated = packet.last_lap_time > 0 and packet.last_lap_time != self._last_lap_time
+        if updated or packets_left <= 0:
+            # a partial lap still waits for its lap time so it isn't credited to the next lap
+            if packet.last_lap_time > 0 and lap_number != self._partial_lap:
+                self.store.add_lap(self.session_id, self._car_id, lap_number, packet.last_lap_time,
+                                   fuel_used, max_speed)
+            self._last_lap_time = packet.last_lap_time
+            self._pending = None
+        else:
+            self._pending = (lap_number, fuel_used, max_speed, packets_left - 1)
+
+    def _start_session(self, packet: TelemetryPacket):
+        self.close()
+        self._car_id = packet.car_id
+        self._lap = packet.current_lap
+        self._lap_start_fuel = packet.current_fuel
+        self._max_speed = 0.0
+        self._last_lap_time = packet.last_lap_time
+        self._pending = None
+        self._partial_lap = None if self._at_start else packet.current_lap
+        self.session_id = self.store.start_session(self.ps_ip, packet.car_id)
+
+    def close(self):
+        if self.session_id is not None:
+            self.store.end_session(self.session_id)
+            self.session_id = None
+
+
+async def track_laps(store: LapStore, ps_ip: str,
+                     stream: AsyncIterator[TelemetryPacket]) -> AsyncGenerator[TelemetryPacket, None]:
+    """Pass packets through unchanged while recording sessions and laps."""
+    tracker = LapTracker(store, ps_ip)
+    try:
+        async with aclosing(stream) as packets:
+            async for packet in packets:
+                tracker.update(packet)
+                yield packet
+    finally:
+        tracker.close()
+        logger.debug("Lap tracking ended for {}", ps_ip)
@@ -0,0 +1,69 @@
+# Rate Limited Logging
+import threading
+import time
+from typing import Callable, Dict, List
+
+from loguru import logger
+
+
+class RateLimitedLogger:
+    """
+        Logs at most `burst` messages per key every `interval` seconds. Further messages with
+        the same key are counted instead of written, and the count is reported with the next
+        message that gets through, so an error storm turns into one line per interval.
+
+        Messages use loguru's lazy "{}" formatting, nothing is formatted for dropped messages.
+    """
+
+    def __init__(self, interval: float = 5.0, burst: int = 3, clock: Callable[[], float] = time.monotonic):
+        self.interval = interval
+        self.burst = burst
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._windows: Dict[str, List[float]] = {}  # key -> [window start, emitted, suppressed]
+
+    def configure(self, interval: float, burst: int):
+        self.interval = interval
+        self.burst = burst
+
+    def log(self, level: str, key: str, message: str, *args) -> bool:
+        """Log `message` under `key` unless its rate limit is exhausted. Returns whether it was written."""
+        return self._log(level, key, message, args)
+
+    def error(self, key: str, message: str, *args) -> bool:
+        return self._log("ERROR", key, message, args)
+
+    def warning(self, key: str, message: str, *args) -> bool:
+        return self._log("WARNING", key, message, args)
+
+    def _log(self, level: str, key: str, message: str, args: tuple) -> bool:
+        now = self.clock()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                suppressed = int(window[2]) if window else 0
+                self._windows[key] = window = [now, 0, 0]
+            else:
+                suppressed = 0
+
+            if window[1] >= self.burst:
+                window[2] += 1
+                return False
+            window[1] += 1
+
+        # attribute the message to whoever called log/error/warning
+        log = logger.opt(depth=2)
+        if suppressed:
+            log.log(level, message + " ({} similar messages suppressed)", *args, suppressed)
+        else:
+            log.log(level, message, *args)
+        return True
+
+    def suppressed(self) -> Dict[str, int]:
+        """Messages currently held back per key, for metrics."""
+        with self._lock:
+            return {key: int(window[2]) for key, window in self._windows.items() if window[2]}
+
+
+# Create singleton instance
+rate_limited_logger = RateLimitedLogger()
@@ -23,6 +23,45 @@ class Vector3(BaseModel):
     z: float
 
 
+class DerivedChannels(BaseModel):
+    """Channels computed server-side from consecutive packets."""
+    model_config = ConfigDict(from_attributes=True)
+
+    g_longitudinal: float               # + accelerating, - braking
+    g_lateral: float
+    wheel_slip: Optional[float] = None  # driven wheel slip ratio, 0 = no slip
+    upshift_rpm: Optional[float] = None # optimal upshift point for the current gear
+    shift_now: bool = False
+
+
+class TireStats(BaseModel):
+    """Thermal summary for one tire."""
+    model_config = ConfigDict(from_attributes=True)
+
+    temp: float                         # latest raw temperature
+    trend: float                        # exponentially weighted moving average
+    lap_peak: float                     # hottest temperature so far this lap
+    last_lap_peak: Optional[float] = None
+    window_fraction: float              # share of this lap spent inside the optimal window
+    last_lap_window_fraction: Optional[float] = None
+
+
+class TireThermalSummary(BaseModel):
+    """Low rate tire temperature analytics, sent instead of the full packet feed."""
+    model_config = ConfigDict(from_attributes=True)
+
+    packet_id: int
+    current_lap: int
+    optimal_min: float
+    optimal_max: float
+    fl: TireStats
+    fr: TireStats
+    rl: TireStats
+    rr: TireStats
+    front_rear_balance: float           # + fronts hotter than rears (trend, degrees)
+    left_right_balance: float           # + left side hotter than right side
+
+
 class SimulatorFlags(IntFlag):
     """Flags indicating various simulator states."""
     NONE = 0
@@ -105,4 +144,7 @@ class TelemetryPacket(BaseModel):
 
     # Car identification
     car_id: int
-    car_info: Optional[CarInfo] = None
\ No newline at end of file
+    car_info: Optional[CarInfo] = None
+
+    # Derived channels
+    derived: Optional[DerivedChannels] = None
\ No newline at end of file
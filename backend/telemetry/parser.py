@@ -1,21 +1,32 @@
 # Telemetry Data Parser
 import struct
+from typing import Optional
 
-from loguru import logger
-from .models import TelemetryPacket, Vector3
+from .models import TelemetryPacket, Vector3, SimulatorFlags
 from .data.car_processor import car_processor
 from .fuel_monitor import FuelMonitor
+from .derived import DerivedChannelEngine
+from .profiling import ProfileSample
+from .log_limiter import rate_limited_logger
 
 
 class TelemetryParser:
     """Parser for GT7 telemetry binary data."""
-    def __init__(self):
+    def __init__(self, derived_channels: bool = True):
         self.fuel_monitor = FuelMonitor()
+        self.derived_channels = DerivedChannelEngine() if derived_channels else None
         self._previous_lap = 0
 
-    def parse(self, data: bytes) -> TelemetryPacket:
+    @staticmethod
+    def parse_flags(data: bytes) -> SimulatorFlags:
+        """Decode only the simulator flags word, without parsing the rest of the packet."""
+        return SimulatorFlags(struct.unpack('H', data[0x8E:0x90])[0])
+
+    def parse(self, data: bytes, sample: Optional[ProfileSample] = None) -> TelemetryPacket:
         """Parse binary telemetry data into TelemetryPacket model."""
         try:
+            if sample:
+                sample.begin('unpack')
             car_id = struct.unpack('i', data[0x124:0x128])[0]
 
             # basic fuel data from binary packet
@@ -35,7 +46,7 @@ class TelemetryParser:
             fuel_percentage = self.fuel_monitor.calculate_fuel_percentage(current_fuel, fuel_capacity)
             current_lap_consumption = self.fuel_monitor.get_current_lap_consumption()
 
-            return TelemetryPacket(
+            fields = dict(
                 # Basic packet info
                 packet_id=struct.unpack('i', data[0x70:0x74])[0],
 
@@ -125,9 +136,25 @@ class TelemetryParser:
                 ],
 
                 # Car identification
-                car_id=car_id,
-                car_info=car_processor.get_car_info(car_id)
+                car_id=car_id
             )
+
+            if sample:
+                sample.switch('car_info')
+            car_info = car_processor.get_car_info(car_id)
+
+            if sample:
+                sample.switch('model')
+            packet = TelemetryPacket(**fields, car_info=car_info)
+
+            if self.derived_channels:
+                if sample:
+                    sample.switch('derived')
+                packet.derived = self.derived_channels.update(packet)
+
+            if sample:
+                sample.end()
+            return packet
         except Exception as e:
-            logger.error(f"Error parsing telemetry data: {str(e)}")
+            rate_limited_logger.error("parse", "Error parsing telemetry data: {}", e)
             raise
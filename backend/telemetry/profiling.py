@@ -0,0 +1,146 @@
+# Hot Path Profiling
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+HISTOGRAM_BUCKETS = 24  # log2 buckets in microseconds, the last one is open ended
+
+
+class ProfileSample:
+    """Nested stage timings for a single sampled packet."""
+    __slots__ = ('_profiler', '_stack', '_spans')
+
+    def __init__(self, profiler: "StageProfiler"):
+        self._profiler = profiler
+        self._stack: List[Tuple[str, int]] = []
+        self._spans: List[Tuple[str, int]] = []
+
+    def begin(self, stage: str):
+        self._stack.append((stage, time.perf_counter_ns()))
+
+    def end(self):
+        stage, started = self._stack.pop()
+        path = ";".join([name for name, _ in self._stack] + [stage])
+        self._spans.append((path, time.perf_counter_ns() - started))
+        if not self._stack:
+            self._profiler._record(self._spans)
+
+    def switch(self, stage: str):
+        """End the current stage and begin the next one at the same level."""
+        self.end()
+        self.begin(stage)
+
+
+class StageProfiler:
+    """
+        Sampling profiler for the per-packet pipeline stages.
+
+        Every 1/sample_rate-th call to sample() for a given root stage returns a
+        ProfileSample that the hot path uses to time its nested stages, all other calls
+        return None. With a sample rate of 0 the only cost per packet is that one check.
+    """
+
+    def __init__(self, sample_rate: float = 0.0):
+        self._lock = threading.Lock()
+        self._interval = 0
+        self._countdowns: Dict[str, int] = {}  # per root stage so call sites don't alias
+        self._stats: Dict[str, List[int]] = {}  # path -> [count, total_ns, *histogram]
+        self.set_sample_rate(sample_rate)
+
+    @property
+    def sample_rate(self) -> float:
+        return 1.0 / self._interval if self._interval else 0.0
+
+    def set_sample_rate(self, sample_rate: float):
+        """Enable (0 < rate <= 1) or disable (0) sampling at runtime."""
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError("Sample rate must be between 0 and 1")
+        self._interval = round(1 / sample_rate) if sample_rate else 0
+        self._countdowns.clear()
+
+    def sample(self, stage: str) -> Optional[ProfileSample]:
+        """Start a sample with `stage` as its root for this packet, or None if it isn't sampled."""
+        if not self._interval:
+            return None
+        countdown = self._countdowns.get(stage, self._interval) - 1
+        if countdown > 0:
+            self._countdowns[stage] = countdown
+            return None
+        self._countdowns[stage] = self._interval
+        sample = ProfileSample(self)
+        sample.begin(stage)
+        return sample
+
+    def _record(self, spans: List[Tuple[str, int]]):
+        with self._lock:
+            for path, elapsed in spans:
+                stats = self._stats.get(path)
+                if stats is None:
+                    stats = self._stats[path] = [0, 0] + [0] * HISTOGRAM_BUCKETS
+                stats[0] += 1
+                stats[1] += elapsed
+                bucket = min((elapsed // 1000).bit_length(), HISTOGRAM_BUCKETS - 1)
+                stats[2 + bucket] += 1
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+    @staticmethod
+    def _bucket_upper_us(bucket: int) -> float:
+        return float(1 << bucket) if bucket < HISTOGRAM_BUCKETS - 1 else float('inf')
+
+    @staticmethod
+    def _bucket_label(bucket: int) -> str:
+        if bucket < HISTOGRAM_BUCKETS - 1:
+            return f"<{1 << bucket}us"
+        return f">={1 << (bucket - 1)}us"
+
+    def _percentile_us(self, histogram: List[int], count: int, percentile: float) -> float:
+        threshold = count * percentile
+        seen = 0
+        for bucket, hits in enumerate(histogram):
+            seen += hits
+            if seen >= threshold:
+                return self._bucket_upper_us(bucket)
+        return self._bucket_upper_us(HISTOGRAM_BUCKETS - 1)
+
+    def histogram(self) -> Dict[str, dict]:
+        """Per stage counts, mean and bucketed latency (upper bounds in microseconds)."""
+        with self._lock:
+            snapshot = {path: list(stats) for path, stats in self._stats.items()}
+
+        result = {}
+        for path, (count, total, *histogram) in sorted(snapshot.items()):
+            result[path] = {
+                "count": count,
+                "mean_us": total / count / 1000,
+                "p50_us": self._percentile_us(histogram, count, 0.5),
+                "p99_us": self._percentile_us(histogram, count, 0.99),
+                "buckets": {
+                    self._bucket_label(bucket): hits for bucket, hits in enumerate(histogram) if hits
+                },
+            }
+        return result
+
+    def collapsed(self) -> str:
+        """
+            Profile in collapsed stack format ("ingest;parse;car_info 1234" per line, self time
+            in microseconds), ready for flamegraph.pl or speedscope.
+        """
+        with self._lock:
+            totals = {path: stats[1] for path, stats in self._stats.items()}
+
+        self_times = dict(totals)
+        for path, total in totals.items():
+            parent, _, _ = path.rpartition(";")
+            if parent in self_times:
+                self_times[parent] -= total
+
+        return "\n".join(
+            f"{path} {max(elapsed, 0) // 1000}" for path, elapsed in sorted(self_times.items())
+        )
+
+
+# Create singleton instance
+profiler = StageProfiler()
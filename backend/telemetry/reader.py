@@ -1,35 +1,73 @@
 # GT7 UDP Reader
 import socket
-from typing import AsyncGenerator
+import time
+from typing import AsyncGenerator, Dict, Optional
 from loguru import logger
 from Crypto.Cipher import Salsa20
 import asyncio
 
 from .parser import TelemetryParser
-from .models import TelemetryPacket
+from .models import TelemetryPacket, SimulatorFlags
+from .recorder import SessionRecorder
+from .jitter import JitterBuffer
+from .profiling import profiler
+from .log_limiter import rate_limited_logger
 
 
 class TelemetryReader:
     SEND_PORT = 33739
     RECEIVE_PORT = 33740
     BUFFER_SIZE = 4096
-    HEARTBEAT_INTERVAL = 100  # packets
+    PACKET_SIZE = 0x128  # smallest packet the parser can read
+    HEARTBEAT_INTERVAL = 1.6  # seconds, GT7 stops sending after ~100 packets without one
+    SOCKET_TIMEOUT = 10  # seconds without packets before the socket is rebound
+    STALL_THRESHOLD = 0.25  # seconds without packets before the stream counts as stalled
+    RETRY_INTERVAL = 0.1  # first re-subscribe delay while stalled, doubles up to HEARTBEAT_INTERVAL
+    IDLE_OUTPUT_INTERVAL = 1.0  # seconds between packets sent while paused/loading/off track
 
-    def __init__(self, ps_ip: str):
+    def __init__(self, ps_ip: str, heartbeat_interval: Optional[float] = None,
+                 socket_timeout: Optional[float] = None, idle_output_interval: Optional[float] = None,
+                 derived_channels: bool = True, recorder: Optional[SessionRecorder] = None):
         """Initialize UDP connection to GT7."""
         self.ps_ip = ps_ip
+        self.heartbeat_interval = heartbeat_interval or self.HEARTBEAT_INTERVAL
+        self.socket_timeout = socket_timeout or self.SOCKET_TIMEOUT
+        self.idle_output_interval = (
+            self.IDLE_OUTPUT_INTERVAL if idle_output_interval is None else idle_output_interval
+        )
         self.socket = None
         self.is_running = False
-        self.parser = TelemetryParser()
+        self.parser = TelemetryParser(derived_channels=derived_channels)
+        self.recorder = recorder
+
+        # heartbeat scheduler state
+        self._last_packet_time: Optional[float] = None
+        self._last_heartbeat_time: Optional[float] = None
+        self._stalled_since: Optional[float] = None
+
+        # skip-work state while the car is idle
+        self._idle = False
+        self._last_idle_output = 0.0
+
+        # metrics, including those of the jitter buffer the stream is run through (if any)
+        self.jitter_buffer: Optional[JitterBuffer] = None
+        self.packets_received = 0
+        self.packets_skipped = 0
+        self.packets_malformed = 0
+        self.heartbeats_sent = 0
+        self.stalls = 0
+        self.reconnects = 0
+        self.last_recovery_time: Optional[float] = None
+        self.max_recovery_time = 0.0
+        self._total_recovery_time = 0.0
 
     def initialize_socket(self):
         """Initialize and bind the UDP socket."""
-        if self.socket:
-            self.close()
+        self._close_socket()
 
         self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         self.socket.bind(('0.0.0.0', self.RECEIVE_PORT))
-        self.socket.settimeout(10)
+        self.socket.setblocking(False)
         self.is_running = True
 
     def _send_heartbeat(self):
@@ -37,8 +75,104 @@ class TelemetryReader:
         if self.socket and self.is_running:
             try:
                 self.socket.sendto(b'A', (self.ps_ip, self.SEND_PORT))
+                self._last_heartbeat_time = time.monotonic()
+                self.heartbeats_sent += 1
             except Exception as e:
-                logger.error(f"Error sending heartbeat: {str(e)}")
+                rate_limited_logger.error("heartbeat", "Error sending heartbeat: {}", e)
+
+    def _next_heartbeat_delay(self, now: float) -> float:
+        """
+            Seconds until the next heartbeat is due. While packets are flowing this is the
+            regular heartbeat interval, while stalled we re-subscribe with a short backoff.
+        """
+        last_heartbeat = self._last_heartbeat_time or 0.0
+        if self._stalled_since is None:
+            return self.heartbeat_interval - (now - last_heartbeat)
+
+        stalled_for = now - self._stalled_since
+        retry = self.RETRY_INTERVAL
+        while retry < stalled_for and retry < self.heartbeat_interval:
+            retry *= 2
+        return min(retry, self.heartbeat_interval) - (now - last_heartbeat)
+
+    async def _heartbeat_loop(self):
+        """Timer-driven heartbeat, independent of how many packets arrive."""
+        while self.is_running:
+            now = time.monotonic()
+            last_packet = self._last_packet_time or 0.0
+            if self._stalled_since is None and now - last_packet > self.STALL_THRESHOLD:
+                self._stalled_since = last_packet or now
+                self.stalls += 1
+                logger.warning("Telemetry stalled for {}, re-subscribing", self.ps_ip)
+
+            delay = self._next_heartbeat_delay(now)
+            if delay <= 0:
+                self._send_heartbeat()
+                delay = self._next_heartbeat_delay(time.monotonic())
+            await asyncio.sleep(min(max(delay, 0.01), self.STALL_THRESHOLD))
+
+    def _on_packet(self):
+        """Record packet arrival, closing out any stall."""
+        now = time.monotonic()
+        self._last_packet_time = now
+        self.packets_received += 1
+        if self._stalled_since is not None:
+            recovery = now - self._stalled_since
+            self._stalled_since = None
+            self.last_recovery_time = recovery
+            self.max_recovery_time = max(self.max_recovery_time, recovery)
+            self._total_recovery_time += recovery
+            logger.info("Telemetry recovered for {} after {:.2f}s", self.ps_ip, recovery)
+
+    @property
+    def last_packet_time(self) -> Optional[float]:
+        """time.monotonic() of the last datagram received, including idle ones that aren't emitted."""
+        return self._last_packet_time
+
+    def metrics(self) -> Dict[str, Optional[float]]:
+        """Heartbeat and recovery metrics for this reader."""
+        recoveries = self.stalls - (1 if self._stalled_since is not None else 0)
+        return {
+            "packets_received": self.packets_received,
+            "packets_skipped": self.packets_skipped,
+            "packets_malformed": self.packets_malformed,
+            "idle": self._idle,
+            "heartbeats_sent": self.heartbeats_sent,
+            "stalls": self.stalls,
+            "reconnects": self.reconnects,
+            "stalled": self._stalled_since is not None,
+            "last_recovery_s": self.last_recovery_time,
+            "max_recovery_s": self.max_recovery_time,
+            "avg_recovery_s": (self._total_recovery_time / recoveries) if recoveries else None,
+            "jitter": self.jitter_buffer.stats() if self.jitter_buffer else None,
+        }
+
+    @staticmethod
+    def is_idle(flags: SimulatorFlags) -> bool:
+        """Whether the car is paused, loading or not on track, so there is nothing worth streaming."""
+        if flags & (SimulatorFlags.PAUSED | SimulatorFlags.LOADING):
+            return True
+        return not flags & SimulatorFlags.CAR_ON_TRACK
+
+    def _should_skip(self, flags: SimulatorFlags) -> bool:
+        """
+            Decide from the flags word alone whether a packet can skip full parsing.
+            The first packet of every state change always goes through so clients see it
+            straight away, after that idle packets are rate limited to idle_output_interval
+            (or suppressed entirely when it is 0).
+        """
+        idle = self.is_idle(flags)
+        changed = idle != self._idle
+        self._idle = idle
+        if not idle:
+            return False
+
+        now = time.monotonic()
+        if changed or (self.idle_output_interval > 0 and
+                       now - self._last_idle_output >= self.idle_output_interval):
+            self._last_idle_output = now
+            return False
+        return True
 
     def _decrypt_packet(self, data: bytes) -> bytes:
         """Decrypt received telemetry data using Salsa20."""
@@ -66,43 +200,80 @@ class TelemetryReader:
     async def stream(self) -> AsyncGenerator[TelemetryPacket, None]:
         """Stream telemetry data from GT7."""
         self.initialize_socket()
-        packet_count = 0
+        loop = asyncio.get_running_loop()
 
-        try:
-            self._send_heartbeat()  # Initial heartbeat
+        self._last_packet_time = time.monotonic()
+        self._send_heartbeat()  # Initial heartbeat
+        heartbeat_task = asyncio.create_task(self._heartbeat_loop())
 
+        try:
             while self.is_running:
                 try:
-                    data, _ = self.socket.recvfrom(self.BUFFER_SIZE)
-                    packet_count += 1
-
-                    if packet_count > self.HEARTBEAT_INTERVAL:
-                        self._send_heartbeat()
-                        packet_count = 0
+                    data = await asyncio.wait_for(
+                        loop.sock_recv(self.socket, self.BUFFER_SIZE),
+                        timeout=self.socket_timeout
+                    )
+                    self._on_packet()
+                    packet = None
 
+                    sample = profiler.sample('ingest')
+                    if sample:
+                        sample.begin('decrypt')
                     decrypted_data = self._decrypt_packet(data)
-                    if decrypted_data:
-                        yield self.parser.parse(decrypted_data)
+
+                    if decrypted_data and len(decrypted_data) < self.PACKET_SIZE:
+                        rate_limited_logger.warning("malformed", "Dropping short packet of {} bytes", len(decrypted_data))
+                        self.packets_malformed += 1
+                    elif decrypted_data:
+                        if self.recorder:
+                            self.recorder.write(decrypted_data)
+                        if self._should_skip(self.parser.parse_flags(decrypted_data)):
+                            self.packets_skipped += 1
+                        else:
+                            if sample:
+                                sample.switch('parse')
+                            try:
+                                packet = self.parser.parse(decrypted_data, sample)
+                            except Exception:
+                                # already logged (rate limited) by the parser, drop the packet
+                                self.packets_malformed += 1
+                                sample = None
+
+                    if sample:
+                        sample.end()
+                        sample.end()
+                    if packet is not None:
+                        yield packet
 
                     # Allow other tasks to run
                     await asyncio.sleep(0)
 
-                except socket.timeout:
-                    logger.warning("Socket timeout - sending heartbeat")
+                except asyncio.TimeoutError:
+                    # closed while waiting, don't take the port back
+                    if not self.is_running:
+                        break
+                    logger.warning("Socket timeout - rebinding socket")
+                    self.initialize_socket()
+                    self.reconnects += 1
                     self._send_heartbeat()
-                    packet_count = 0
                 except Exception as e:
-                    logger.error(f"Error in telemetry stream: {str(e)}")
+                    logger.error("Error in telemetry stream: {}", e)
                     if not self.is_running:
                         break
                     raise
 
         finally:
+            heartbeat_task.cancel()
             self.close()
 
     def close(self):
         """Close the UDP socket and cleanup."""
         self.is_running = False
+        if self.recorder:
+            self.recorder.close()
+        self._close_socket()
+
+    def _close_socket(self):
         if self.socket:
             try:
                 self.socket.close()
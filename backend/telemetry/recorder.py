@@ -0,0 +1,70 @@
+# Session Recording
+import struct
+import time
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional, Tuple, Union
+
+from loguru import logger
+
+
+class SessionRecorder:
+    """
+        Records decrypted GT7 datagrams to disk so sessions can be replayed or exported.
+
+        File format: an 8 byte magic header followed by records of
+        <float64 timestamp><uint32 length><payload>, all little-endian.
+    """
+    MAGIC = b'GT7REC01'
+    RECORD_HEADER = struct.Struct('<dI')
+    EXTENSION = '.gt7'
+
+    def __init__(self, path: Union[str, Path], buffer_size: int = 1 << 16):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file: Optional[BinaryIO] = open(self.path, 'wb', buffering=buffer_size)
+        self._file.write(self.MAGIC)
+        self.packets_written = 0
+        logger.info(f"Recording session to {self.path}")
+
+    @classmethod
+    def for_console(cls, directory: Union[str, Path], ps_ip: str) -> "SessionRecorder":
+        """Create a recorder with a timestamped file name for a console."""
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}_{ps_ip.replace('.', '-')}{cls.EXTENSION}"
+        return cls(Path(directory) / name)
+
+    def write(self, data: bytes, timestamp: Optional[float] = None):
+        """Append one decrypted datagram."""
+        if self._file is None:
+            return
+        self._file.write(self.RECORD_HEADER.pack(time.time() if timestamp is None else timestamp, len(data)))
+        self._file.write(data)
+        self.packets_written += 1
+
+    def close(self):
+        """Flush and close the recording."""
+        if self._file is not None:
+            try:
+                self._file.close()
+                logger.info(f"Recorded {self.packets_written} packets to {self.path}")
+            except Exception as e:
+                logger.error(f"Error closing recording {self.path}: {str(e)}")
+            self._file = None
+
+
+def read_session(path: Union[str, Path]) -> Iterator[Tuple[float, bytes]]:
+    """Iterate (timestamp, decrypted datagram) records of a recording without loading it into memory."""
+    header = SessionRecorder.RECORD_HEADER
+    with open(path, 'rb') as f:
+        if f.read(len(SessionRecorder.MAGIC)) != SessionRecorder.MAGIC:
+            raise ValueError(f"Not a GT7 session recording: {path}")
+
+        while True:
+            record = f.read(header.size)
+            if len(record) < header.size:
+                break
+            timestamp, length = header.unpack(record)
+            data = f.read(length)
+            if len(data) < length:
+                logger.warning(f"Truncated record at end of {path}")
+                break
+            yield timestamp, data
@@ -0,0 +1,106 @@
+# Tire Thermal Analytics
+import math
+from typing import List, Optional
+
+from .models import TelemetryPacket, TireStats, TireThermalSummary
+
+TIRES = ('fl', 'fr', 'rl', 'rr')
+
+
+class TireThermalTracker:
+    """
+        Tracks tire temperature trends, per-lap peaks and time spent inside the optimal
+        window for all four tires. State is a handful of floats per tire regardless of
+        session length, and a summary is produced every `summary_interval` seconds of
+        game time rather than per packet.
+    """
+    PACKET_RATE = 60.0  # GT7 sends one packet per frame
+    MAX_GAP = 0.5  # seconds, longer gaps (pause, lost packets) aren't counted as time in window
+    RESYNC_GAP = 300  # packets, a bigger jump back means GT7 restarted its packet counter
+
+    def __init__(self, optimal_min: float = 70.0, optimal_max: float = 95.0,
+                 time_constant: float = 5.0, summary_interval: float = 1.0):
+        if optimal_min >= optimal_max:
+            raise ValueError("Optimal window minimum must be below its maximum")
+        self.optimal_min = optimal_min
+        self.optimal_max = optimal_max
+        self.time_constant = time_constant
+        self.summary_interval = summary_interval
+
+        self._previous_id: Optional[int] = None
+        self._lap: Optional[int] = None
+        self._since_summary = 0.0
+        self._lap_time = 0.0
+
+        self._temps: List[float] = [0.0] * 4
+        self._trends: List[Optional[float]] = [None] * 4
+        self._lap_peaks: List[float] = [-math.inf] * 4
+        self._in_window: List[float] = [0.0] * 4
+        self._last_lap_peaks: List[Optional[float]] = [None] * 4
+        self._last_lap_window: List[Optional[float]] = [None] * 4
+
+    def update(self, packet: TelemetryPacket) -> Optional[TireThermalSummary]:
+        """Feed the next packet, returns a summary when one is due."""
+        # out of order or repeated packets carry no new information
+        if self._previous_id is not None and packet.packet_id <= self._previous_id:
+            if self._previous_id - packet.packet_id <= self.RESYNC_GAP:
+                return None
+            self._previous_id = None  # counter restarted, carry on from this packet
+        dt = 0.0 if self._previous_id is None else (packet.packet_id - self._previous_id) / self.PACKET_RATE
+        self._previous_id = packet.packet_id
+        if dt > self.MAX_GAP:
+            dt = 0.0
+
+        if packet.current_lap != self._lap:
+            self._start_lap(packet.current_lap)
+
+        alpha = 1.0 - math.exp(-dt / self.time_constant) if dt else 0.0
+        temps = (packet.tire_temp_fl, packet.tire_temp_fr, packet.tire_temp_rl, packet.tire_temp_rr)
+        for index, temp in enumerate(temps):
+            self._temps[index] = temp
+            trend = self._trends[index]
+            self._trends[index] = temp if trend is None else trend + alpha * (temp - trend)
+            if temp > self._lap_peaks[index]:
+                self._lap_peaks[index] = temp
+            if self.optimal_min <= temp <= self.optimal_max:
+                self._in_window[index] += dt
+        self._lap_time += dt
+
+        self._since_summary += dt
+        if self._since_summary < self.summary_interval:
+            return None
+        self._since_summary = 0.0
+        return self.summary(packet)
+
+    def _start_lap(self, lap: int):
+        # the lap before the first one seen is partial, don't report it as a full lap
+        if self._lap is not None and self._lap_time > 0:
+            self._last_lap_peaks = list(self._lap_peaks)
+            self._last_lap_window = [time / self._lap_time for time in self._in_window]
+        self._lap = lap
+        self._lap_time = 0.0
+        self._lap_peaks = [-math.inf] * 4
+        self._in_window = [0.0] * 4
+
+    def summary(self, packet: TelemetryPacket) -> TireThermalSummary:
+        tires = {
+            name: TireStats(
+                temp=self._temps[index],
+                trend=self._trends[index],
+                lap_peak=self._lap_peaks[index],
+                last_lap_peak=self._last_lap_peaks[index],
+                window_fraction=self._in_window[index] / self._lap_time if self._lap_time else 0.0,
+                last_lap_window_fraction=self._last_lap_window[index],
+            )
+            for index, name in enumerate(TIRES)
+        }
+        fl, fr, rl, rr = self._trends
+        return TireThermalSummary(
+            packet_id=packet.packet_id,
+            current_lap=packet.current_lap,
+            optimal_min=self.optimal_min,
+            optimal_max=self.optimal_max,
+            front_rear_balance=(fl + fr) / 2 - (rl + rr) / 2,
+            left_right_balance=(fl + rl) / 2 - (fr + rr) / 2,
+            **tires
+        )
@@ -0,0 +1,56 @@
+import pytest
+from backend.telemetry.models import Vector3, TelemetryPacket
+
+
+@pytest.fixture
+def make_packet():
+    """Factory for TelemetryPacket instances with sensible defaults."""
+    def _make_packet(packet_id: int = 1, **overrides) -> TelemetryPacket:
+        fields = dict(
+            packet_id=packet_id,
+            position=Vector3(x=0.0, y=0.0, z=0.0),
+            velocity=Vector3(x=0.0, y=0.0, z=0.0),
+            rotation=Vector3(x=0.0, y=0.0, z=0.0),
+            rel_orientation_to_north=0.0,
+            angular_velocity=Vector3(x=0.0, y=0.0, z=0.0),
+            body_height=0.1,
+            engine_rpm=1000.0,
+            gas_level=50.0,
+            gas_capacity=100.0,
+            speed_mps=10.0,
+            turbo_boost=1.0,
+            oil_pressure=5.0,
+            water_temp=80.0,
+            oil_temp=90.0,
+            tire_temp_fl=50.0,
+            tire_temp_fr=50.0,
+            tire_temp_rl=50.0,
+            tire_temp_rr=50.0,
+            current_gear=1,
+            suggested_gear=2,
+            flags=1,
+            throttle=128,
+            brake=0,
+            clutch=1.0,
+            clutch_engagement=1.0,
+            rpm_after_clutch=1000.0,
+            transmission_top_speed=200.0,
+            gear_ratios=[3.2, 2.1, 1.5, 1.2, 1.0, 0.9, 0.8, 0.7],
+            best_lap_time=0,
+            last_lap_time=0,
+            current_lap=1,
+            total_laps=0,
+            current_position=1,
+            total_positions=1,
+            rpm_flashing=7000,
+            rpm_hit=8000,
+            fuel_percentage=50.0,
+            fuel_capacity=100.0,
+            current_fuel=50.0,
+            fuel_consumption_lap=0.0,
+            car_id=24,
+        )
+        fields.update(overrides)
+        return TelemetryPacket(**fields)
+
+    return _make_packet
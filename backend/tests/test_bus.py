@@ -0,0 +1,205 @@
+import asyncio
+import json
+import pytest
+from backend.telemetry.bus import TelemetryBusServer, TelemetryBusClient, TelemetryHub
+
+
+class FakeReader:
+    """Stands in for TelemetryReader, the bus only needs close() and metrics()."""
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+    def metrics(self):
+        return {}
+
+
+@pytest.fixture
+def bus_factory(tmp_path, make_packet):
+    """Bus server whose consoles replay `count` packets, one every `interval` seconds."""
+    readers = []
+
+    def _bus_factory(count: int = 5, interval: float = 0.01, queue_size: int = 256, max_subscribers: int = 0):
+        def open_stream(ps_ip):
+            reader = FakeReader()
+            readers.append(reader)
+
+            async def stream():
+                for packet_id in range(1, count + 1):
+                    await asyncio.sleep(interval)
+                    yield make_packet(packet_id)
+            return reader, stream()
+
+        server = TelemetryBusServer(str(tmp_path / "bus.sock"), open_stream, queue_size=queue_size,
+                                    max_subscribers=max_subscribers)
+        return server, readers
+
+    return _bus_factory
+
+
+@pytest.mark.asyncio
+async def test_bus_fans_out_to_subscribers(bus_factory):
+    """Test every subscriber of a console gets every packet, serialized once by the ingest side."""
+    server, readers = bus_factory(count=5, interval=0.05)
+    await server.start()
+    client = TelemetryBusClient(server.path)
+
+    async def collect():
+        return [json.loads(message)["packet_id"] async for message in client.subscribe("192.168.1.10")]
+
+    try:
+        first = asyncio.create_task(collect())
+        second = asyncio.create_task(collect())
+        results = await asyncio.wait_for(asyncio.gather(first, second), timeout=5)
+    finally:
+        await server.close()
+
+    # the second subscriber may join a packet late, but both share one reader
+    assert results[0] == [1, 2, 3, 4, 5]
+    assert results[1][-1] == 5
+    assert len(readers) == 1
+
+
+@pytest.mark.asyncio
+async def test_bus_stops_reader_without_subscribers(bus_factory):
+    """Test the console reader is closed when the last subscriber leaves."""
+    server, readers = bus_factory(count=1000, interval=0.01)
+    await server.start()
+    client = TelemetryBusClient(server.path)
+
+    try:
+        messages = client.subscribe("192.168.1.10")
+        assert json.loads(await messages.__anext__())["packet_id"] == 1
+        assert (await client.stats())["consoles"]["192.168.1.10"]["subscribers"] == 1
+        await messages.aclose()
+
+        for _ in range(50):
+            if readers[0].closed:
+                break
+            await asyncio.sleep(0.02)
+        assert readers[0].closed
+        assert (await client.stats())["consoles"] == {}
+    finally:
+        await server.close()
+
+
+@pytest.mark.asyncio
+async def test_bus_rejects_subscribers_over_the_cap(bus_factory):
+    """Test a console accepts at most max_subscribers viewers across all workers."""
+    server, readers = bus_factory(count=1000, interval=0.01, max_subscribers=1)
+    await server.start()
+    client = TelemetryBusClient(server.path)
+
+    try:
+        first = client.subscribe("192.168.1.10")
+        assert json.loads(await first.__anext__())["packet_id"] == 1
+
+        rejected = [json.loads(message) async for message in client.subscribe("192.168.1.10")]
+        assert rejected == [{"error": "Too many viewers for this PlayStation"}]
+        assert (await client.stats())["rejected"] == 1
+        await first.aclose()
+    finally:
+        await server.close()
+
+
+@pytest.mark.asyncio
+async def test_bus_drops_oldest_for_slow_subscribers(bus_factory):
+    """Test a subscriber that can't keep up loses its oldest packets instead of blocking ingest."""
+    from backend.telemetry.bus import _Subscriber
+
+    subscriber = _Subscriber(queue_size=2)
+    for payload in (b"1", b"2", b"3"):
+        subscriber.offer(payload)
+
+    assert subscriber.dropped == 1
+    assert [subscriber.queue.get_nowait(), subscriber.queue.get_nowait()] == [b"2", b"3"]
+
+
+@pytest.mark.asyncio
+async def test_bus_publishes_tire_summaries(bus_factory):
+    """Test the tires topic carries low rate summaries computed by the ingest process."""
+    server, readers = bus_factory(count=130, interval=0.001)
+    await server.start()
+    client = TelemetryBusClient(server.path)
+
+    try:
+        messages = [json.loads(message) async for message in client.subscribe("192.168.1.10", topic="tires")]
+    finally:
+        await server.close()
+
+    assert [message["packet_id"] for message in messages] == [61, 121]
+    assert "fl" in messages[0]
+    assert len(readers) == 1
+
+
+@pytest.mark.asyncio
+async def test_bus_rejects_unknown_topics(bus_factory):
+    """Test subscribing to a topic the bus doesn't publish is an invalid request."""
+    server, readers = bus_factory()
+    await server.start()
+    client = TelemetryBusClient(server.path)
+
+    try:
+        messages = [json.loads(message) async for message in client.subscribe("192.168.1.10", topic="laps")]
+    finally:
+        await server.close()
+
+    assert messages == [{"error": "Invalid bus request"}]
+    assert readers == []
+
+
+@pytest.mark.asyncio
+async def test_bus_serves_ingest_profile(bus_factory):
+    """Test workers can read and configure the ingest process's profiler over the bus."""
+    from backend.telemetry.bus import profiler
+
+    server, _ = bus_factory()
+    await server.start()
+    client = TelemetryBusClient(server.path)
+
+    try:
+        profile = await client.profile(sample_rate=1.0)
+        assert profile["sample_rate"] == 1.0
+        sample = profiler.sample('ingest')
+        sample.end()
+        profile = await client.profile()
+        assert profile["stages"]["ingest"]["count"] == 1
+        assert profile["collapsed"].startswith("ingest ")
+
+        with pytest.raises(ValueError):
+            await client.profile(sample_rate=2.0)
+        assert (await client.profile(sample_rate=0.0, reset=True))["stages"] == {}
+    finally:
+        profiler.set_sample_rate(0.0)
+        profiler.reset()
+        await server.close()
+
+
+@pytest.mark.asyncio
+async def test_hub_shares_one_reader_between_topics(make_packet):
+    """Test packet and tire viewers of a console in one process share a single reader."""
+    readers = []
+
+    def open_stream(ps_ip):
+        reader = FakeReader()
+        readers.append(reader)
+
+        async def stream():
+            for packet_id in range(1, 131):
+                await asyncio.sleep(0.001)
+                yield make_packet(packet_id)
+        return reader, stream()
+
+    hub = TelemetryHub(open_stream)
+
+    async def collect(topic):
+        return [json.loads(message)["packet_id"] async for message in hub.messages("192.168.1.10", topic)]
+
+    packets, tires = await asyncio.wait_for(asyncio.gather(collect("packets"), collect("tires")), timeout=5)
+
+    assert packets == list(range(1, 131))
+    assert tires == [61, 121]
+    assert len(readers) == 1
+    assert hub.stats()["consoles"] == {}
@@ -0,0 +1,83 @@
+import asyncio
+import time
+import pytest
+from starlette.websockets import WebSocketState
+from backend.telemetry.connections import ConnectionManager
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.application_state = WebSocketState.CONNECTED
+
+    async def close(self):
+        self.application_state = WebSocketState.DISCONNECTED
+
+
+def test_connect_limits():
+    """Test connections over the total or per address limit are rejected with their reason."""
+    manager = ConnectionManager(max_connections=2, max_per_ip=1)
+    assert manager.connect("10.0.0.1:1", "10.0.0.1", FakeWebSocket()) is None
+    assert manager.connect("10.0.0.1:2", "10.0.0.1", FakeWebSocket()) == "Too many connections from this address"
+    assert manager.connect("10.0.0.2:1", "10.0.0.2", FakeWebSocket()) is None
+    assert manager.connect("10.0.0.3:1", "10.0.0.3", FakeWebSocket()) == "Server is at its connection limit"
+
+    assert manager.stats() == {
+        "active": 2,
+        "rejected": {"max_per_ip": 1, "max_connections": 1},
+        "evicted": {},
+    }
+
+
+def test_attach_limits_viewers_per_console():
+    """Test a console accepts at most max_per_console viewers."""
+    manager = ConnectionManager(max_per_console=1)
+    for client_id in ("a", "b", "c"):
+        manager.connect(client_id, client_id, FakeWebSocket())
+
+    assert manager.attach("a", "192.168.1.10") is None
+    assert manager.attach("b", "192.168.1.10") == "Too many viewers for this PlayStation"
+    assert manager.attach("c", "192.168.1.11") is None
+    assert manager.rejected["max_per_console"] == 1
+
+
+@pytest.mark.asyncio
+async def test_evict_idle_cancels_stream():
+    """Test a connection without telemetry is disconnected and its stream task cancelled."""
+    manager = ConnectionManager(idle_timeout=0.05)
+    websocket = FakeWebSocket()
+    manager.connect("a", "10.0.0.1", websocket)
+    manager.attach("a", "192.168.1.10")
+    stream_task = asyncio.create_task(asyncio.sleep(10))
+    manager.add_task("a", stream_task)
+
+    eviction = asyncio.create_task(manager.evict_idle(interval=0.02))
+    try:
+        await asyncio.wait_for(asyncio.gather(stream_task, return_exceptions=True), timeout=2)
+    finally:
+        eviction.cancel()
+
+    assert stream_task.cancelled()
+    assert not manager.is_connected("a")
+    assert websocket.application_state == WebSocketState.DISCONNECTED
+    assert manager.evicted["idle"] == 1
+
+
+@pytest.mark.asyncio
+async def test_reader_packets_count_as_activity():
+    """Test a paused console whose packets aren't sent (idle output suppressed) isn't evicted."""
+    last_packet = {"192.168.1.10": None}
+    manager = ConnectionManager(idle_timeout=0.1, last_packet_time=last_packet.get)
+    manager.connect("a", "10.0.0.1", FakeWebSocket())
+    manager.attach("a", "192.168.1.10")
+
+    eviction = asyncio.create_task(manager.evict_idle(interval=0.02))
+    try:
+        for _ in range(15):
+            last_packet["192.168.1.10"] = time.monotonic()
+            await asyncio.sleep(0.02)
+        assert manager.is_connected("a")
+
+        await asyncio.sleep(0.3)
+        assert not manager.is_connected("a")
+    finally:
+        eviction.cancel()
@@ -0,0 +1,91 @@
+import pytest
+from backend.telemetry.models import Vector3
+from backend.telemetry.derived import DerivedChannelEngine
+
+
+def test_longitudinal_g_from_velocity_delta(make_packet):
+    """Test accelerating in a straight line gives positive longitudinal G."""
+    engine = DerivedChannelEngine()
+    engine.G_SMOOTHING = 1.0
+
+    engine.update(make_packet(1, velocity=Vector3(x=0.0, y=0.0, z=20.0)))
+    # +1 m/s over one frame = 60 m/s^2
+    derived = engine.update(make_packet(2, velocity=Vector3(x=0.0, y=0.0, z=21.0)))
+
+    assert derived.g_longitudinal == pytest.approx(60.0 / 9.80665)
+    assert derived.g_lateral == pytest.approx(0.0)
+
+
+def test_lateral_g_when_cornering(make_packet):
+    """Test a sideways velocity change shows up as lateral G only."""
+    engine = DerivedChannelEngine()
+    engine.G_SMOOTHING = 1.0
+
+    engine.update(make_packet(1, velocity=Vector3(x=0.0, y=0.0, z=20.0)))
+    derived = engine.update(make_packet(3, velocity=Vector3(x=0.5, y=0.0, z=20.0)))
+
+    assert abs(derived.g_lateral) == pytest.approx(15.0 / 9.80665, rel=1e-2)
+    assert derived.g_longitudinal == pytest.approx(0.0, abs=0.05)
+
+
+def test_out_of_order_packets_ignored(make_packet):
+    """Test stale packets don't corrupt velocity deltas."""
+    engine = DerivedChannelEngine()
+    engine.update(make_packet(5, velocity=Vector3(x=0.0, y=0.0, z=20.0)))
+    derived = engine.update(make_packet(4, velocity=Vector3(x=0.0, y=0.0, z=0.0)))
+
+    assert derived.g_longitudinal == 0.0
+
+
+def test_g_forces_resume_after_packet_id_restart(make_packet):
+    """Test G-forces keep updating when GT7 restarts its packet counter."""
+    engine = DerivedChannelEngine()
+    engine.G_SMOOTHING = 1.0
+    engine.update(make_packet(10000, velocity=Vector3(x=0.0, y=0.0, z=20.0)))
+    engine.update(make_packet(1, velocity=Vector3(x=0.0, y=0.0, z=20.0)))
+    derived = engine.update(make_packet(2, velocity=Vector3(x=0.0, y=0.0, z=21.0)))
+
+    assert derived.g_longitudinal == pytest.approx(60.0 / 9.80665)
+
+
+def test_wheel_slip_after_calibration(make_packet):
+    """Test wheel slip is relative to the drivetrain constant learned while cruising."""
+    engine = DerivedChannelEngine()
+    ratios = [3.0, 2.0, 1.5, 1.2, 1.0, 0.0, 0.0, 0.0]
+
+    # cruising in 2nd: 30 m/s at 4000 rpm
+    cruise = dict(current_gear=2, gear_ratios=ratios, clutch=0.0, throttle=50, brake=0)
+    assert engine.update(make_packet(1, speed_mps=30.0, engine_rpm=4000.0, **cruise)).wheel_slip == pytest.approx(0.0)
+
+    # full throttle, engine spinning 10% faster than the road speed implies
+    spinning = dict(cruise, throttle=255)
+    derived = engine.update(make_packet(2, speed_mps=30.0, engine_rpm=4400.0, **spinning))
+    assert derived.wheel_slip == pytest.approx(0.1)
+
+
+def test_shift_point_falls_back_to_rev_indicator(make_packet):
+    """Test the upshift RPM defaults to rpm_flashing until curves are learned."""
+    engine = DerivedChannelEngine()
+    derived = engine.update(make_packet(1, current_gear=2, engine_rpm=7500.0, rpm_flashing=7000))
+
+    assert derived.upshift_rpm == 7000
+    assert derived.shift_now
+
+    top_gear = engine.update(make_packet(2, current_gear=8, engine_rpm=7500.0, rpm_flashing=7000))
+    assert not top_gear.shift_now
+
+
+def test_shift_point_learned_from_crossover(make_packet):
+    """Test the learned shift point is where the next gear pulls harder."""
+    engine = DerivedChannelEngine()
+    ratios = [2.0, 1.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0]
+    bin_size = engine.RPM_BIN_SIZE
+
+    # 1st gear loses acceleration above 6000 rpm, 2nd gear is flat
+    for rpm_bin in range(engine.RPM_BINS):
+        rpm = (rpm_bin + 0.5) * bin_size
+        engine._accel[0][rpm_bin] = 1.0 if rpm < 6000 else 0.2
+        engine._accel[1][rpm_bin] = 0.5
+
+    engine._refresh_shift_points(make_packet(1, gear_ratios=ratios, rpm_hit=9000))
+    assert engine._shift_points[0] == pytest.approx(6000 + bin_size / 2)
@@ -0,0 +1,112 @@
+import csv
+import struct
+import pytest
+from backend.telemetry.recorder import SessionRecorder, read_session
+from backend.telemetry.parser import TelemetryParser
+from backend.telemetry.export import export_session, iter_session_rows, parse_lap_range, packet_columns
+
+
+def make_datagram(packet_id: int, lap: int, speed: float) -> bytes:
+    """Build a minimal decrypted datagram for a known car."""
+    data = bytearray(0x128)
+    struct.pack_into('i', data, 0x70, packet_id)
+    struct.pack_into('f', data, 0x4C, speed)
+    struct.pack_into('h', data, 0x74, lap)
+    struct.pack_into('i', data, 0x124, 24)  # car id present in cars.csv
+    return bytes(data)
+
+
+@pytest.fixture
+def recorded_session(tmp_path):
+    """Record a short three lap session."""
+    recorder = SessionRecorder(tmp_path / "session.gt7")
+    for packet_id in range(30):
+        recorder.write(make_datagram(packet_id, lap=packet_id // 10 + 1, speed=float(packet_id)),
+                       timestamp=1000.0 + packet_id / 60)
+    recorder.close()
+    return tmp_path / "session.gt7"
+
+
+def test_recorder_roundtrip(recorded_session):
+    """Test recorded datagrams are read back in order."""
+    records = list(read_session(recorded_session))
+    assert len(records) == 30
+    assert records[0][0] == 1000.0
+    assert records[5][1] == make_datagram(5, lap=1, speed=5.0)
+
+
+def test_read_session_rejects_other_files(tmp_path):
+    """Test non-recordings are rejected."""
+    path = tmp_path / "bogus.gt7"
+    path.write_bytes(b"not a recording")
+    with pytest.raises(ValueError):
+        list(read_session(path))
+
+
+def test_export_csv_with_fields_and_laps(recorded_session, tmp_path):
+    """Test CSV export honors field selection and lap ranges across batches."""
+    output = tmp_path / "out.csv"
+    written = export_session(recorded_session, output, fields=["packet_id", "current_lap", "speed_mps"],
+                             laps=(2, 3), batch_size=7)
+    assert written == 20
+
+    with open(output, newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert list(rows[0].keys()) == ["packet_id", "current_lap", "speed_mps"]
+    assert rows[0]["packet_id"] == "10"
+    assert rows[-1]["current_lap"] == "3"
+
+
+def test_lap_filter_skips_parsing(recorded_session, monkeypatch):
+    """Test datagrams outside the lap range are skipped before they are parsed."""
+    parsed = []
+    parse = TelemetryParser.parse
+
+    def counting_parse(self, data):
+        parsed.append(data)
+        return parse(self, data)
+
+    monkeypatch.setattr(TelemetryParser, "parse", counting_parse)
+    rows = list(iter_session_rows(recorded_session, fields=["current_lap"], laps=(2, 2)))
+    assert len(rows) == len(parsed) == 10
+    assert {row["current_lap"] for row in rows} == {2}
+
+
+def test_export_full_columns(recorded_session, tmp_path):
+    """Test a full export writes every flattened column."""
+    output = tmp_path / "out.csv"
+    export_session(recorded_session, output)
+
+    with open(output, newline="") as f:
+        header = next(csv.reader(f))
+    assert header == list(packet_columns())
+    assert "position_x" in header and "gear_ratio_8" in header and "car_info_name" in header
+
+
+def test_export_parquet(recorded_session, tmp_path):
+    """Test Parquet export writes one row group per batch."""
+    pq = pytest.importorskip("pyarrow.parquet")
+    output = tmp_path / "out.parquet"
+    export_session(recorded_session, output, batch_size=10)
+
+    parquet = pq.ParquetFile(output)
+    assert parquet.metadata.num_rows == 30
+    assert parquet.metadata.num_row_groups == 3
+
+
+def test_export_invalid_arguments(recorded_session, tmp_path):
+    """Test unsupported formats and unknown fields are rejected."""
+    with pytest.raises(ValueError, match="Unsupported export format"):
+        export_session(recorded_session, tmp_path / "out.json")
+    with pytest.raises(ValueError, match="Unknown export fields"):
+        export_session(recorded_session, tmp_path / "out.csv", fields=["nope"])
+
+
+def test_parse_lap_range():
+    """Test lap range parsing."""
+    assert parse_lap_range("3") == (3, 3)
+    assert parse_lap_range("2-5") == (2, 5)
+    with pytest.raises(ValueError):
+        parse_lap_range("5-2")
+    with pytest.raises(ValueError):
+        parse_lap_range("x")
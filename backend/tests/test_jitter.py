@@ -0,0 +1,157 @@
+import asyncio
+import pytest
+from backend.telemetry.models import Vector3
+from backend.telemetry.jitter import JitterBuffer, interpolate_packets, jitter_stream
+
+
+def test_jitter_reorders_within_latency(make_packet):
+    """Test out-of-order packets are released in packet_id order."""
+    buffer = JitterBuffer(latency=0.05)
+
+    buffer.push(make_packet(1), now=0.0)
+    assert [p.packet_id for p in buffer.pop_ready(now=0.05)] == [1]
+
+    buffer.push(make_packet(3), now=0.06)
+    buffer.push(make_packet(2), now=0.07)
+    assert [p.packet_id for p in buffer.pop_ready(now=0.07)] == [2, 3]
+    assert buffer.stats()["reordered"] == 1
+
+
+def test_jitter_holds_gap_until_latency_expires(make_packet):
+    """Test a missing packet delays release by at most the latency budget."""
+    buffer = JitterBuffer(latency=0.05)
+    buffer.push(make_packet(1), now=0.0)
+    buffer.pop_ready(now=0.05)
+
+    buffer.push(make_packet(3), now=0.1)
+    assert buffer.pop_ready(now=0.12) == []
+    assert [p.packet_id for p in buffer.pop_ready(now=0.16)] == [3]
+    assert buffer.stats()["max_delay_ms"] == pytest.approx(60.0)
+
+
+def test_jitter_drops_stale_and_duplicates(make_packet):
+    """Test late and repeated packets are dropped."""
+    buffer = JitterBuffer(latency=0.0)
+    buffer.push(make_packet(5), now=0.0)
+    buffer.pop_ready(now=0.0)
+
+    assert not buffer.push(make_packet(4), now=0.01)
+    assert buffer.push(make_packet(6), now=0.01)
+    assert not buffer.push(make_packet(6), now=0.01)
+
+    stats = buffer.stats()
+    assert stats["dropped_stale"] == 1
+    assert stats["dropped_duplicate"] == 1
+
+
+def test_jitter_overflow_is_bounded(make_packet):
+    """Test the buffer never holds more than max_packets."""
+    buffer = JitterBuffer(latency=10.0, max_packets=4)
+    for packet_id in range(10, 0, -1):
+        buffer.push(make_packet(packet_id), now=0.0)
+
+    assert len(buffer) <= 4
+    assert buffer.stats()["dropped_overflow"] + buffer.stats()["dropped_stale"] == 6
+
+
+def test_interpolate_packets(make_packet):
+    """Test continuous fields are interpolated and discrete ones are not."""
+    a = make_packet(1, engine_rpm=1000.0, position=Vector3(x=0.0, y=0.0, z=0.0), current_gear=2)
+    b = make_packet(2, engine_rpm=2000.0, position=Vector3(x=10.0, y=0.0, z=-4.0), current_gear=3)
+
+    mid = interpolate_packets(a, b, 0.25)
+    assert mid.engine_rpm == 1250.0
+    assert mid.position.x == 2.5
+    assert mid.position.z == -1.0
+    assert mid.current_gear == 2
+    assert mid.packet_id == 1
+
+
+def test_jitter_paced_sample(make_packet):
+    """Test paced output interpolates between packets behind the live edge."""
+    buffer = JitterBuffer(latency=0.1, packet_rate=10.0)
+    buffer.push(make_packet(1, speed_mps=10.0), now=0.0)
+    buffer.push(make_packet(2, speed_mps=20.0), now=0.1)
+    buffer.push(make_packet(3, speed_mps=30.0), now=0.2)
+
+    assert buffer.sample(now=0.0) is None  # still inside the latency budget
+    assert buffer.sample(now=0.15).speed_mps == pytest.approx(15.0)
+    assert buffer.sample(now=0.3).speed_mps == pytest.approx(30.0)
+
+
+def test_jitter_paced_sample_stops_when_source_goes_quiet(make_packet):
+    """Test the last packet is held for at most the latency instead of repeated forever."""
+    buffer = JitterBuffer(latency=0.1, packet_rate=10.0)
+    buffer.push(make_packet(1), now=0.0)
+    buffer.push(make_packet(2), now=0.1)
+
+    assert buffer.sample(now=0.0) is None
+    assert buffer.sample(now=0.2).packet_id == 2
+    assert buffer.sample(now=0.3).packet_id == 2
+    assert buffer.sample(now=0.35) is None
+    assert buffer.sample(now=5.0) is None
+
+
+def test_jitter_resyncs_after_packet_id_restart(make_packet):
+    """Test a large backwards jump in packet_id (game restart) resets the buffer instead of freezing."""
+    buffer = JitterBuffer(latency=0.0)
+    for packet_id in range(10000, 10010):
+        buffer.push(make_packet(packet_id), now=0.0)
+    buffer.pop_ready(now=0.0)
+
+    assert buffer.push(make_packet(1), now=1.0)
+    assert buffer.push(make_packet(2), now=1.0)
+    assert [p.packet_id for p in buffer.pop_ready(now=1.0)] == [1, 2]
+    assert buffer.stats()["resyncs"] == 1
+    assert buffer.stats()["dropped_stale"] == 0
+
+
+@pytest.mark.asyncio
+async def test_jitter_stream_releases_gap_without_new_packets(make_packet):
+    """Test a packet behind a gap is released after the latency even if the source goes quiet."""
+    closed = asyncio.Event()
+
+    async def source():
+        try:
+            yield make_packet(1)
+            yield make_packet(3)
+            await asyncio.sleep(10)
+        finally:
+            closed.set()
+
+    stream = jitter_stream(source(), JitterBuffer(latency=0.05))
+    try:
+        ids = [(await stream.__anext__()).packet_id for _ in range(2)]
+        assert ids == [1, 3]
+    finally:
+        await asyncio.wait_for(stream.aclose(), timeout=1)
+    # closing the stream closes its source
+    assert closed.is_set()
+
+
+@pytest.mark.asyncio
+async def test_jitter_stream_paced_output_stops_without_packets(make_packet):
+    """Test paced output doesn't keep sending the last packet once the source goes quiet."""
+    async def source():
+        for packet_id in range(1, 11):
+            yield make_packet(packet_id)
+            await asyncio.sleep(1 / 60)
+        await asyncio.sleep(10)
+
+    stream = jitter_stream(source(), JitterBuffer(latency=0.05), output_rate=60)
+    ids = []
+
+    async def consume():
+        async for packet in stream:
+            ids.append(packet.packet_id)
+
+    try:
+        await asyncio.wait_for(consume(), timeout=1.0)
+    except asyncio.TimeoutError:
+        pass
+    finally:
+        await stream.aclose()
+
+    assert ids[-1] == 10
+    # a hold of about `latency` (3 ticks at 60 Hz) is allowed, not a second of duplicates
+    assert ids.count(10) <= 5
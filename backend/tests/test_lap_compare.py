@@ -0,0 +1,129 @@
+import math
+import struct
+import pytest
+from backend.telemetry.recorder import SessionRecorder
+from backend.telemetry.lap_compare import compare_laps, read_lap, lap_distance, MAX_GRID_POINTS
+
+TRACK_RADIUS = 100.0
+TRACK_LENGTH = 2 * math.pi * TRACK_RADIUS
+
+
+def make_datagram(packet_id: int, lap: int, distance: float, speed: float, throttle: int, gear: int,
+                  flags: int = 0) -> bytes:
+    """Build a decrypted datagram for a car driving around a circular track."""
+    angle = distance / TRACK_RADIUS
+    data = bytearray(0x128)
+    struct.pack_into('fff', data, 0x04, TRACK_RADIUS * math.cos(angle), 0.0, TRACK_RADIUS * math.sin(angle))
+    struct.pack_into('f', data, 0x4C, speed)
+    struct.pack_into('i', data, 0x70, packet_id)
+    struct.pack_into('h', data, 0x74, lap)
+    struct.pack_into('H', data, 0x8E, flags)
+    struct.pack_into('BBB', data, 0x90, gear, throttle, 0)
+    return bytes(data)
+
+
+def record_laps(path, speeds, laps=None, gap=0, pause_at=None, pause_packets=0):
+    """
+        Record one lap per speed (m/s) at a constant speed, numbered 1, 2... unless `laps` is
+        given. `gap` packet ids are skipped between laps, and the game is paused for
+        `pause_packets` once `pause_at` metres into every lap.
+    """
+    recorder = SessionRecorder(path)
+    packet_id = 0
+    for index, speed in enumerate(speeds):
+        lap = laps[index] if laps else index + 1
+        packet_id += gap if index else 0
+        distance = 0.0
+        paused = False
+        while distance < TRACK_LENGTH:
+            packet_id += 1
+            recorder.write(make_datagram(packet_id, lap, distance, speed, throttle=int(speed), gear=lap))
+            distance += speed / 60
+            if pause_at is not None and not paused and distance >= pause_at:
+                paused = True
+                for _ in range(pause_packets):
+                    packet_id += 1
+                    recorder.write(make_datagram(packet_id, lap, distance, 0.0, 0, gear=lap, flags=0b11))
+    recorder.close()
+    return path
+
+
+@pytest.fixture
+def session(tmp_path):
+    return record_laps(tmp_path / "session.gt7", [40.0, 50.0])
+
+
+def test_lap_distance_follows_position(session):
+    """Test distance along the lap is integrated from positions."""
+    distance = lap_distance(read_lap(session, 1))
+    assert distance[-1] == pytest.approx(TRACK_LENGTH, rel=0.01)
+
+
+def test_compare_lap_with_itself(session):
+    """Test a lap compared with itself has no time delta."""
+    result = compare_laps(session, 1, session, 1, resolution=5.0)
+    assert len(result["distance"]) == len(result["time_delta"]) == len(result["lap"]["speed_mps"])
+    assert max(abs(delta) for delta in result["time_delta"]) < 1e-9
+
+
+def test_compare_laps_across_sessions(session, tmp_path):
+    """Test aligned traces and time delta between a slower lap and a faster reference."""
+    reference = record_laps(tmp_path / "reference.gt7", [60.0])
+    result = compare_laps(session, 1, reference, 1, resolution=1.0)
+
+    assert result["lap"]["speed_mps"][10] == pytest.approx(40.0)
+    assert result["reference"]["speed_mps"][10] == pytest.approx(60.0)
+    assert set(result["lap"]["gear"]) == {1}
+    assert result["lap"]["throttle"][0] == 40.0
+    # 40 m/s vs 60 m/s loses 1/120 s per metre
+    halfway = len(result["distance"]) // 2
+    assert result["time_delta"][halfway] == pytest.approx(result["distance"][halfway] / 120, rel=0.02)
+    assert result["lap_time_s"] == pytest.approx(TRACK_LENGTH / 40, rel=0.01)
+
+
+def test_missing_lap(session):
+    """Test laps that weren't recorded are reported."""
+    with pytest.raises(LookupError):
+        compare_laps(session, 5, session, 1)
+
+
+def test_invalid_resolution(session):
+    """Test the distance grid resolution must be positive."""
+    with pytest.raises(ValueError):
+        compare_laps(session, 1, session, 2, resolution=0)
+
+
+def test_grid_size_is_capped(session):
+    """Test a resolution that would allocate an oversized grid is rejected."""
+    with pytest.raises(ValueError):
+        compare_laps(session, 1, session, 2, resolution=TRACK_LENGTH / (MAX_GRID_POINTS * 2))
+
+
+def test_restarted_lap_is_not_merged(tmp_path):
+    """Test the same lap number recorded twice (a restart) is read as separate runs."""
+    path = record_laps(tmp_path / "restart.gt7", [40.0, 50.0], laps=[1, 1], gap=600)
+
+    assert lap_distance(read_lap(path, 1))[-1] == pytest.approx(TRACK_LENGTH, rel=0.01)
+    assert read_lap(path, 1)['speed_mps'][0] == 50.0
+    assert read_lap(path, 1, occurrence=0)['speed_mps'][0] == 40.0
+    result = compare_laps(path, 1, path, 1, occurrence=0)
+    assert result["length_m"] == pytest.approx(TRACK_LENGTH, rel=0.01)
+    assert result["lap_time_s"] == pytest.approx(TRACK_LENGTH / 40, rel=0.01)
+    assert result["reference_lap_time_s"] == pytest.approx(TRACK_LENGTH / 50, rel=0.01)
+    with pytest.raises(LookupError):
+        read_lap(path, 1, occurrence=2)
+
+
+def test_lap_counter_going_back_splits_runs(tmp_path):
+    """Test a restart without a packet_id gap is detected from the lap counter."""
+    path = record_laps(tmp_path / "restart.gt7", [40.0, 45.0, 50.0], laps=[1, 2, 1])
+    assert read_lap(path, 1)['speed_mps'][0] == 50.0
+    assert read_lap(path, 1, occurrence=0)['speed_mps'][0] == 40.0
+
+
+def test_paused_time_is_left_out(tmp_path):
+    """Test packets sent while paused don't add to the lap time or the traces."""
+    path = record_laps(tmp_path / "paused.gt7", [40.0], pause_at=200.0, pause_packets=600)
+    result = compare_laps(path, 1, path, 1)
+    assert result["lap_time_s"] == pytest.approx(TRACK_LENGTH / 40, rel=0.01)
+    assert min(result["lap"]["speed_mps"]) == 40.0
@@ -0,0 +1,138 @@
+import asyncio
+import pytest
+from backend.telemetry.lap_store import LapStore, LapTracker, track_laps
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = LapStore(tmp_path / "laps.db", flush_interval=0.01)
+    yield store
+    store.close()
+
+
+def drive_laps(tracker, make_packet, lap_times, car_id=24, start_id=0):
+    """Feed packets for consecutive laps from the start, setting last_lap_time once each lap completes."""
+    packet_id = start_id + 1
+    last_lap_time = 0
+    fuel = 100.0
+    # on the grid before the start the lap counter is 0
+    tracker.update(make_packet(packet_id, current_lap=0, current_fuel=fuel, car_id=car_id))
+    for lap, lap_time in enumerate(lap_times + [None], start=1):
+        for index in range(10):
+            packet_id += 1
+            fuel -= 0.5
+            # GT7 updates last_lap_time a couple of packets after the lap counter
+            if lap > 1 and index == 2:
+                last_lap_time = lap_times[lap - 2]
+            tracker.update(make_packet(packet_id, current_lap=lap, last_lap_time=last_lap_time,
+                                       current_fuel=fuel, speed_mps=float(lap * 10 + index), car_id=car_id))
+    return packet_id
+
+
+def latest_session(store):
+    sessions = store.recent_sessions(limit=1)
+    assert sessions
+    return sessions[0]["id"]
+
+
+def test_tracker_records_laps(store, make_packet):
+    """Test completed laps are stored with their time, fuel used and max speed."""
+    tracker = LapTracker(store, "192.168.1.2")
+    drive_laps(tracker, make_packet, [90000, 88000])
+    tracker.close()
+    store.close()
+
+    laps = store.session_laps(latest_session(store))
+    assert [(lap["lap_number"], lap["lap_time_ms"]) for lap in laps] == [(1, 90000), (2, 88000)]
+    assert laps[0]["fuel_used"] == pytest.approx(5.0)
+    assert laps[0]["max_speed_mps"] == 19.0
+
+
+def test_best_laps_and_recent_sessions(store, make_packet):
+    """Test the history queries across sessions and cars."""
+    tracker = LapTracker(store, "192.168.1.2")
+    packet_id = drive_laps(tracker, make_packet, [90000, 85000])
+    # restarting the race starts a new session
+    packet_id = drive_laps(tracker, make_packet, [87000], start_id=packet_id)
+    drive_laps(tracker, make_packet, [70000], car_id=25, start_id=packet_id)
+    tracker.close()
+    store.close()
+
+    assert [lap["lap_time_ms"] for lap in store.best_laps(car_id=24)] == [85000, 87000, 90000]
+    assert [lap["lap_time_ms"] for lap in store.best_laps(car_id=24, limit=1)] == [85000]
+    assert store.best_laps()[0]["car_id"] == 25
+
+    sessions = store.recent_sessions(limit=5, car_id=24)
+    assert [session["lap_count"] for session in sessions] == [1, 2]
+    assert sessions[1]["best_lap_ms"] == 85000
+    assert all(session["ended_at"] is not None for session in sessions)
+
+
+def test_incomplete_lap_is_not_recorded(store, make_packet):
+    """Test laps without a lap time (e.g. leaving to the menu) are skipped."""
+    tracker = LapTracker(store, "192.168.1.2")
+    for packet_id in range(1, 100):
+        tracker.update(make_packet(packet_id, current_lap=1 if packet_id < 10 else 2))
+    tracker.close()
+    store.close()
+
+    assert store.best_laps() == []
+
+
+def test_store_is_created_on_first_use(tmp_path):
+    """Test constructing a store doesn't create the database file."""
+    path = tmp_path / "laps.db"
+    store = LapStore(path)
+    assert not path.exists()
+    assert store.best_laps() == []
+    assert path.exists()
+
+
+def test_partial_first_lap_is_not_recorded(store, make_packet):
+    """Test the lap tracking joined mid-way is skipped, later laps are recorded."""
+    tracker = LapTracker(store, "192.168.1.2")
+    for packet_id in range(1, 40):
+        lap = 3 if packet_id < 20 else 4
+        last_lap_time = 0 if packet_id < 22 else 80000
+        tracker.update(make_packet(packet_id, current_lap=lap, last_lap_time=last_lap_time))
+    for packet_id in range(40, 60):
+        tracker.update(make_packet(packet_id, current_lap=5, last_lap_time=81000 if packet_id > 42 else 80000))
+    tracker.close()
+    store.close()
+
+    assert [(lap["lap_number"], lap["lap_time_ms"]) for lap in store.best_laps()] == [(4, 81000)]
+
+
+def test_packets_without_a_lap_are_ignored(store, make_packet):
+    """Test packets before the start (current_lap 0) don't open or restart sessions."""
+    tracker = LapTracker(store, "192.168.1.2")
+    for packet_id in range(1, 10):
+        tracker.update(make_packet(packet_id, current_lap=0))
+    assert tracker.session_id is None
+
+    drive_laps(tracker, make_packet, [90000], start_id=10)
+    session_id = tracker.session_id
+    tracker.update(make_packet(100, current_lap=0))
+    assert tracker.session_id == session_id
+    tracker.close()
+    store.close()
+
+    assert len(store.recent_sessions()) == 1
+
+
+@pytest.mark.asyncio
+async def test_track_laps_closes_its_source(store, make_packet):
+    """Test closing the tracking stream closes the stream it wraps."""
+    closed = asyncio.Event()
+
+    async def source():
+        try:
+            for packet_id in range(1, 1000):
+                yield make_packet(packet_id)
+        finally:
+            closed.set()
+
+    stream = track_laps(store, "192.168.1.2", source())
+    await stream.__anext__()
+    await stream.aclose()
+    assert closed.is_set()
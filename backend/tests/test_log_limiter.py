@@ -0,0 +1,38 @@
+import pytest
+from loguru import logger
+from backend.telemetry.log_limiter import RateLimitedLogger
+
+
+@pytest.fixture
+def messages():
+    """Capture loguru messages."""
+    captured = []
+    handler_id = logger.add(lambda message: captured.append(message.record["message"]), level="DEBUG")
+    yield captured
+    logger.remove(handler_id)
+
+
+def test_rate_limited_logger_aggregates_bursts(messages):
+    """Test repeated messages are dropped after the burst and counted into the next window."""
+    now = [0.0]
+    limiter = RateLimitedLogger(interval=5.0, burst=2, clock=lambda: now[0])
+
+    results = [limiter.error("parse", "Error parsing telemetry data: {}", index) for index in range(10)]
+    assert results == [True, True] + [False] * 8
+    assert messages == ["Error parsing telemetry data: 0", "Error parsing telemetry data: 1"]
+    assert limiter.suppressed() == {"parse": 8}
+
+    now[0] = 5.0
+    assert limiter.error("parse", "Error parsing telemetry data: {}", "late")
+    assert messages[-1] == "Error parsing telemetry data: late (8 similar messages suppressed)"
+    assert limiter.suppressed() == {}
+
+
+def test_rate_limited_logger_keys_are_independent(messages):
+    """Test each key has its own budget."""
+    limiter = RateLimitedLogger(interval=5.0, burst=1, clock=lambda: 0.0)
+
+    assert limiter.error("parse", "a")
+    assert not limiter.error("parse", "a")
+    assert limiter.warning("heartbeat", "b")
+    assert messages == ["a", "b"]
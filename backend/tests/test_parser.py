@@ -83,4 +83,12 @@ def test_parser_specific_fields(sample_telemetry_data, field_offset, field_value
     parser = TelemetryParser()
     result = parser.parse(sample_telemetry_data)
 
-    assert getattr(result, field_type) == field_value
\ No newline at end of file
+    assert getattr(result, field_type) == field_value
+
+def test_parser_parse_flags(sample_telemetry_data):
+    """Test decoding only the simulator flags word."""
+    struct.pack_into('H', sample_telemetry_data, 0x8E, 0b11)
+    flags = TelemetryParser.parse_flags(sample_telemetry_data)
+
+    assert backend.telemetry.models.SimulatorFlags.CAR_ON_TRACK in flags
+    assert backend.telemetry.models.SimulatorFlags.PAUSED in flags
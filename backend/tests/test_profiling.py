@@ -0,0 +1,50 @@
+import pytest
+from backend.telemetry.profiling import StageProfiler
+
+
+def test_profiler_disabled_by_default():
+    """Test no samples are taken when the sample rate is 0."""
+    profiler = StageProfiler()
+    assert all(profiler.sample('ingest') is None for _ in range(100))
+    assert profiler.histogram() == {}
+
+
+def test_profiler_sample_rate():
+    """Test one in every 1/sample_rate packets is sampled."""
+    profiler = StageProfiler(sample_rate=0.1)
+    samples = [profiler.sample('ingest') for _ in range(100)]
+    assert sum(sample is not None for sample in samples) == 10
+
+    # root stages are sampled independently of each other
+    for _ in range(9):
+        assert profiler.sample('ingest') is None
+        assert profiler.sample('send') is None
+    assert profiler.sample('ingest') is not None
+    assert profiler.sample('send') is not None
+
+    with pytest.raises(ValueError):
+        profiler.set_sample_rate(2.0)
+
+
+def test_profiler_nested_stages():
+    """Test nested stages are recorded per stack path and collapse to self time."""
+    profiler = StageProfiler(sample_rate=1.0)
+    for _ in range(3):
+        sample = profiler.sample('ingest')
+        sample.begin('decrypt')
+        sample.switch('parse')
+        sample.begin('model')
+        sample.end()
+        sample.end()
+        sample.end()
+
+    histogram = profiler.histogram()
+    assert set(histogram) == {'ingest', 'ingest;decrypt', 'ingest;parse', 'ingest;parse;model'}
+    assert histogram['ingest;parse;model']['count'] == 3
+    assert sum(histogram['ingest']['buckets'].values()) == 3
+
+    lines = profiler.collapsed().splitlines()
+    assert [line.rsplit(' ', 1)[0] for line in lines] == sorted(histogram)
+
+    profiler.reset()
+    assert profiler.histogram() == {}
@@ -0,0 +1,99 @@
+import asyncio
+import pytest
+from backend.telemetry.models import SimulatorFlags
+from backend.telemetry.reader import TelemetryReader
+
+
+def test_reader_uses_configured_intervals():
+    """Test heartbeat settings are honored and defaults apply otherwise."""
+    reader = TelemetryReader("192.168.1.1", heartbeat_interval=2.0, socket_timeout=5)
+    assert reader.heartbeat_interval == 2.0
+    assert reader.socket_timeout == 5
+
+    reader = TelemetryReader("192.168.1.1")
+    assert reader.heartbeat_interval == TelemetryReader.HEARTBEAT_INTERVAL
+    assert reader.socket_timeout == TelemetryReader.SOCKET_TIMEOUT
+
+
+def test_heartbeat_delay_streaming_and_stalled():
+    """Test heartbeats follow the interval while streaming and back off while stalled."""
+    reader = TelemetryReader("192.168.1.1", heartbeat_interval=1.6)
+    reader._last_heartbeat_time = 100.0
+
+    # streaming: next heartbeat one interval after the last one
+    assert reader._next_heartbeat_delay(100.5) == pytest.approx(1.1)
+
+    # stalled: retry quickly, backing off towards the regular interval
+    reader._stalled_since = 100.0
+    assert reader._next_heartbeat_delay(100.05) == pytest.approx(0.05)
+    assert reader._next_heartbeat_delay(100.3) == pytest.approx(0.1)
+    assert reader._next_heartbeat_delay(105.0) == pytest.approx(1.6 - 5.0)
+
+
+def test_recovery_metrics(mocker):
+    """Test time-to-recover is tracked when packets resume after a stall."""
+    reader = TelemetryReader("192.168.1.1")
+    reader._stalled_since = 10.0
+    reader.stalls = 1
+    assert reader.metrics()["stalled"]
+
+    mocker.patch("backend.telemetry.reader.time.monotonic", return_value=12.5)
+    reader._on_packet()
+
+    metrics = reader.metrics()
+    assert not metrics["stalled"]
+    assert metrics["packets_received"] == 1
+    assert metrics["last_recovery_s"] == pytest.approx(2.5)
+    assert metrics["avg_recovery_s"] == pytest.approx(2.5)
+
+
+def test_idle_packets_are_rate_limited(mocker):
+    """Test paused/loading packets skip parsing, except on state changes and at the idle rate."""
+    monotonic = mocker.patch("backend.telemetry.reader.time.monotonic", return_value=0.0)
+    reader = TelemetryReader("192.168.1.1", idle_output_interval=1.0)
+    driving = SimulatorFlags.CAR_ON_TRACK
+    paused = SimulatorFlags.CAR_ON_TRACK | SimulatorFlags.PAUSED
+
+    assert not reader._should_skip(driving)
+    assert not reader._should_skip(paused)  # state change goes through immediately
+    monotonic.return_value = 0.5
+    assert reader._should_skip(paused)
+    monotonic.return_value = 1.0
+    assert not reader._should_skip(paused)  # idle keep-alive
+    assert not reader._should_skip(driving)  # resumes instantly
+
+    # menus: car not on track at all
+    assert TelemetryReader.is_idle(SimulatorFlags.NONE)
+    assert TelemetryReader.is_idle(SimulatorFlags.CAR_ON_TRACK | SimulatorFlags.LOADING)
+    assert not TelemetryReader.is_idle(driving)
+
+
+def test_idle_packets_suppressed(mocker):
+    """Test an idle output interval of 0 suppresses everything but the state change."""
+    mocker.patch("backend.telemetry.reader.time.monotonic", return_value=100.0)
+    reader = TelemetryReader("192.168.1.1", idle_output_interval=0)
+
+    assert not reader._should_skip(SimulatorFlags.PAUSED)
+    assert reader._should_skip(SimulatorFlags.PAUSED)
+    assert reader._should_skip(SimulatorFlags.PAUSED)
+
+
+@pytest.mark.asyncio
+async def test_close_during_receive_does_not_rebind():
+    """Test a reader closed while waiting for packets ends instead of rebinding its port."""
+    reader = TelemetryReader("127.0.0.1", socket_timeout=0.2)
+    reader.RECEIVE_PORT = 0  # any free port
+
+    async def consume():
+        async for _ in reader.stream():
+            pass
+
+    task = asyncio.create_task(consume())
+    await asyncio.sleep(0.05)
+    assert reader.is_running
+    reader.close()
+
+    await asyncio.wait_for(task, timeout=2)
+    assert not reader.is_running
+    assert reader.socket is None
+    assert reader.reconnects == 0
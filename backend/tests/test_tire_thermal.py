@@ -0,0 +1,67 @@
+import pytest
+from backend.telemetry.tire_thermal import TireThermalTracker
+
+
+def feed(tracker, make_packet, count, start_id=1, lap=1, **temps):
+    summaries = []
+    for packet_id in range(start_id, start_id + count):
+        summary = tracker.update(make_packet(packet_id, current_lap=lap, **temps))
+        if summary is not None:
+            summaries.append(summary)
+    return summaries
+
+
+def test_summaries_are_low_rate(make_packet):
+    """Test one summary is produced per interval of game time, not per packet."""
+    tracker = TireThermalTracker(summary_interval=1.0)
+    summaries = feed(tracker, make_packet, 301)
+    assert len(summaries) == 5
+    assert summaries[0].packet_id == 61
+
+
+def test_trend_follows_temperature(make_packet):
+    """Test the EWMA converges towards a step change over its time constant."""
+    tracker = TireThermalTracker(time_constant=1.0)
+    feed(tracker, make_packet, 60, tire_temp_fl=60.0)
+    summary = feed(tracker, make_packet, 61, start_id=61, tire_temp_fl=90.0)[-1]
+    # one time constant covers ~63% of the step
+    assert summary.fl.trend == pytest.approx(60.0 + 30.0 * 0.632, abs=0.5)
+    assert summary.fl.temp == 90.0
+
+
+def test_lap_peaks_and_window(make_packet):
+    """Test per-lap peaks and time in the optimal window roll over on a new lap."""
+    tracker = TireThermalTracker(optimal_min=70.0, optimal_max=95.0)
+    feed(tracker, make_packet, 61, tire_temp_fl=80.0, tire_temp_rr=100.0)
+    feed(tracker, make_packet, 60, start_id=62, tire_temp_fl=60.0, tire_temp_rr=100.0)
+    summary = feed(tracker, make_packet, 60, start_id=122, lap=2, tire_temp_fl=75.0)[-1]
+
+    assert summary.fl.last_lap_peak == 80.0
+    assert summary.fl.last_lap_window_fraction == pytest.approx(0.5, abs=0.02)
+    assert summary.rr.last_lap_window_fraction == 0.0
+    assert summary.fl.lap_peak == 75.0
+    assert summary.fl.window_fraction == 1.0
+
+
+def test_balance(make_packet):
+    """Test front/rear and left/right balance from the trends."""
+    tracker = TireThermalTracker()
+    summary = feed(tracker, make_packet, 61, tire_temp_fl=90.0, tire_temp_fr=80.0,
+                   tire_temp_rl=70.0, tire_temp_rr=60.0)[-1]
+    assert summary.front_rear_balance == pytest.approx(20.0)
+    assert summary.left_right_balance == pytest.approx(10.0)
+
+
+def test_invalid_window():
+    """Test an empty optimal window is rejected."""
+    with pytest.raises(ValueError):
+        TireThermalTracker(optimal_min=90.0, optimal_max=80.0)
+
+
+def test_resumes_after_packet_id_restart(make_packet):
+    """Test summaries continue when GT7 restarts its packet counter."""
+    tracker = TireThermalTracker()
+    feed(tracker, make_packet, 1000, start_id=5000)
+    summaries = feed(tracker, make_packet, 121, start_id=1)
+    assert len(summaries) == 2
+    assert summaries[1].packet_id - summaries[0].packet_id == 60
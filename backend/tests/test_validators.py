@@ -1,5 +1,5 @@
 import pytest
-from backend.app_config.validators import validate_ps_ip, is_valid_ip
+from backend.app_config.validators import validate_ps_ip, is_valid_ip, validate_session_name
 
 
 def test_is_valid_ip():
@@ -41,4 +41,17 @@ def test_validate_ps_ip():
         validate_ps_ip("192.168.1")
 
     with pytest.raises(ValueError):
-        validate_ps_ip("192.168.1.1.1")
\ No newline at end of file
+        validate_ps_ip("192.168.1.1.1")
+
+def test_validate_session_name():
+    """Test recorded session name validation."""
+    assert validate_session_name("20260101-120000_192-168-1-1.gt7") == "20260101-120000_192-168-1-1.gt7"
+
+    with pytest.raises(ValueError, match="Session name is required"):
+        validate_session_name("")
+
+    with pytest.raises(ValueError, match="Invalid session name"):
+        validate_session_name("../secrets.gt7")
+
+    with pytest.raises(ValueError, match="Invalid session name"):
+        validate_session_name("session.csv")
@@ -12,6 +12,37 @@ export interface Vector3 {
     z: number;
   }
   
+export interface DerivedChannels {
+  g_longitudinal: number;         // + accelerating, - braking
+  g_lateral: number;
+  wheel_slip: number | null;      // driven wheel slip ratio, 0 = no slip
+  upshift_rpm: number | null;     // optimal upshift point for the current gear
+  shift_now: boolean;
+}
+
+export interface TireStats {
+  temp: number;                   // latest raw temperature
+  trend: number;                  // exponentially weighted moving average
+  lap_peak: number;
+  last_lap_peak: number | null;
+  window_fraction: number;        // share of this lap inside the optimal window
+  last_lap_window_fraction: number | null;
+}
+
+// sent by /ws/tires about once per second
+export interface TireThermalSummary {
+  packet_id: number;
+  current_lap: number;
+  optimal_min: number;
+  optimal_max: number;
+  fl: TireStats;
+  fr: TireStats;
+  rl: TireStats;
+  rr: TireStats;
+  front_rear_balance: number;     // + fronts hotter than rears
+  left_right_balance: number;     // + left side hotter than right side
+}
+
 export enum SimulatorFlags {
   NONE = 0,
   CAR_ON_TRACK = 1 << 0,
@@ -129,4 +160,7 @@ export interface TelemetryPacket {
   // Car Code
   car_id: number;                     // Internal car identifier
   car_info: CarInfo;                  // Car information based on CarInfo interface
+
+  // Derived Channels (computed by the backend)
+  derived?: DerivedChannels;
 }